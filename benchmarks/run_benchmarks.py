@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_csv
+from ebb import LiveDataset, load_csv
+from ebb.analytics import (
+    count_emotional_states, get_actor_summary, get_actors_info, get_emotion_sequences, get_emotional_states,
+    get_human_emotional_states, get_interactions_for_all_robots, get_interactions_for_robot, get_transition_matrix,
+    rank_robots_by_transition
+)
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+
+# Mejor tiempo y mediana (s) de 'repeat' ejecuciones de fn; devuelve también su último resultado
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {'best': timings[0], 'median': timings[len(timings) // 2]}, result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Tiempos de cada etapa del cuadro de mando para un CSV sintético del tamaño indicado
+def run_case(n_robots, n_humans, n_interactions, repeat, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ebb.csv')
+        rows = write_csv(path, n_robots, n_humans, n_interactions, seed=seed)
+        size = os.path.getsize(path)
+
+        timings = {}
+        timings['read_csv'], _ = measure(lambda: pd.read_csv(path), repeat)
+        timings['load_csv'], store = measure(lambda: load_csv(path), repeat)
+
+    robot = store.nodes_of_type('Robot')[0]
+    timings['robots_info'], _ = measure(lambda: get_actors_info(store, 'Robot'), repeat)
+    timings['humans_info'], _ = measure(lambda: get_actors_info(store, 'Human'), repeat)
+    timings['actor_summary'], _ = measure(lambda: get_actor_summary(store), repeat)
+    timings['interactions_all_robots'], result_data = measure(lambda: get_interactions_for_all_robots(store), repeat)
+    timings['interactions_one_robot'], _ = measure(lambda: get_interactions_for_robot(store, robot), repeat)
+    timings['emotional_states'], emotional_data = measure(lambda: get_emotional_states(result_data), repeat)
+    timings['emotion_counts'], _ = measure(lambda: count_emotional_states(emotional_data), repeat)
+    timings['human_emotional_states'], _ = measure(lambda: get_human_emotional_states(store), repeat)
+    timings['emotion_sequences'], sequences = measure(lambda: get_emotion_sequences(store), repeat)
+    timings['transition_matrix'], _ = measure(lambda: get_transition_matrix(sequences), repeat)
+    timings['robot_transition_ranking'], _ = measure(lambda: rank_robots_by_transition(sequences), repeat)
+
+    # Añadir las últimas filas (las de unas pocas interacciones) a un conjunto en vivo
+    tail = 100
+    live = LiveDataset(store.copy())
+    new_rows = store.data.iloc[-tail:].astype(object)
+    timings['live_append'], _ = measure(lambda: live.append(new_rows), repeat)
+
+    return {
+        'robots': n_robots,
+        'humans': n_humans,
+        'interactions': n_interactions,
+        'rows': rows,
+        'csv_bytes': size,
+        'store_bytes': store.nbytes,
+        'timings': timings
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Ethical Black Box dashboard data processing")
+    parser.add_argument('--robots', type=int, default=10)
+    parser.add_argument('--humans', type=int, default=20)
+    parser.add_argument('--interactions', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="JSON Lines file the results are appended to")
+    args = parser.parse_args(argv)
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'cases': []
+    }
+    for n_interactions in args.interactions:
+        case = run_case(args.robots, args.humans, n_interactions, args.repeat, args.seed)
+        record['cases'].append(case)
+        print(f"{n_interactions:>10} interactions, {case['rows']:>10} rows")
+        for name, timing in case['timings'].items():
+            print(f"    {name:<26} {timing['best'] * 1000:10.2f} ms")
+
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+EMOTIONS = ['Neutral', 'Happy', 'Angry', 'Sad', 'Useful', 'Appreciated']
+
+# Primera fecha de los datos sintéticos y separación media entre interacciones (s)
+START_DATE = pd.Timestamp('2024-01-01T00:00:00')
+MEAN_GAP_SECONDS = 60
+
+
+def _dates(seconds):
+    return '^' + (START_DATE + pd.to_timedelta(seconds, unit='s')).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _triples(node1, label, node2):
+    node1 = pd.Series(node1, dtype=object)
+    return pd.DataFrame({
+        'node1': node1,
+        'label': label,
+        'node2': pd.Series(node2, dtype=object, index=node1.index)
+    })
+
+
+# Genera un volcado sintético de la Ethical Black Box con el mismo esquema
+# node1/label/node2 que los CSV reales: robots, humanos, interacciones entre
+# ellos con fecha y comentario, y estados emocionales causados por esas
+# interacciones (nodo intermedio con causedBy, hasEmotionalState y date).
+def generate_triples(n_robots, n_humans, n_interactions, emotion_rate=0.7, seed=0):
+    rng = np.random.default_rng(seed)
+
+    robots = np.array([f'Robot{i}' for i in range(1, n_robots + 1)], dtype=object)
+    humans = np.array([f'Human{i}' for i in range(1, n_humans + 1)], dtype=object)
+    emotions = np.array(EMOTIONS, dtype=object)
+    frames = [
+        _triples(robots, 'type', 'Robot'),
+        _triples(robots, 'label', [f"'Robot {i}'@en" for i in range(1, n_robots + 1)]),
+        _triples(humans, 'type', 'Human'),
+        _triples(humans, 'label', [f"'Human {i}'@en" for i in range(1, n_humans + 1)]),
+        _triples(emotions, 'type', 'EmotionalState'),
+        _triples(emotions, 'label', [f"'{emotion.lower()}'@en" for emotion in EMOTIONS]),
+    ]
+
+    # Cada interacción ocurre entre un robot y un humano, en cualquier sentido
+    ids = np.arange(1, n_interactions + 1)
+    interactions = np.array([f'Interaction{i}' for i in ids], dtype=object)
+    robot = robots[rng.integers(0, n_robots, n_interactions)]
+    human = humans[rng.integers(0, n_humans, n_interactions)]
+    robot_first = rng.random(n_interactions) < 0.5
+    performer = np.where(robot_first, robot, human)
+    receiver = np.where(robot_first, human, robot)
+    seconds = np.cumsum(rng.integers(1, 2 * MEAN_GAP_SECONDS, n_interactions))
+
+    frames += [
+        _triples(interactions, 'type', 'Action'),
+        _triples(interactions, 'performedBy', performer),
+        _triples(interactions, 'objectOfAction', receiver),
+        _triples(interactions, 'comment', [f"'Synthetic interaction {i}'@en" for i in ids]),
+        _triples(interactions, 'date', _dates(seconds)),
+    ]
+
+    # Estados emocionales causados por parte de las interacciones
+    caused = rng.random(n_interactions) < emotion_rate
+    states = np.array([f'EmotionalState{i}' for i in ids[caused]], dtype=object)
+    state_values = emotions[rng.integers(0, len(emotions), caused.sum())]
+    frames += [
+        _triples(states, 'causedBy', interactions[caused]),
+        _triples(states, 'hasEmotionalState', state_values),
+        _triples(states, 'date', _dates(seconds[caused] + 1)),
+        _triples(human[caused], 'hasEmotionalState', state_values),
+    ]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_csv(path, n_robots, n_humans, n_interactions, emotion_rate=0.7, seed=0):
+    data = generate_triples(n_robots, n_humans, n_interactions, emotion_rate=emotion_rate, seed=seed)
+    data.to_csv(path, index=False)
+    return len(data)
@@ -0,0 +1,23 @@
+from .analytics import (
+    ACTOR_SUMMARY_COLUMNS, EMOTION_SEQUENCE_COLUMNS, HUMAN_EMOTION_COLUMNS, INTERACTION_COLUMNS,
+    TRANSITION_RANKING_COLUMNS, count_emotional_states, count_performed_interactions, get_actor_summary,
+    get_actors_info, get_dwell_times, get_emotion_sequences, get_emotional_states, get_human_emotional_states,
+    get_interactions_for_all_robots, get_interactions_for_robot, get_performed_interactions, get_transition_matrix,
+    rank_robots_by_transition
+)
+from .cache import DatasetCache, content_hash
+from .dates import DATE_FORMAT, parse_dates
+from .ingest import CHUNK_SIZE, iter_csv_chunks, load_csv
+from .live import LiveDataset
+from .store import COLUMNS, TripleStore, check_columns
+
+__all__ = [
+    'ACTOR_SUMMARY_COLUMNS', 'CHUNK_SIZE', 'COLUMNS', 'DATE_FORMAT', 'EMOTION_SEQUENCE_COLUMNS',
+    'HUMAN_EMOTION_COLUMNS', 'INTERACTION_COLUMNS', 'TRANSITION_RANKING_COLUMNS',
+    'DatasetCache', 'LiveDataset', 'TripleStore',
+    'check_columns', 'content_hash', 'count_emotional_states', 'count_performed_interactions',
+    'get_actor_summary', 'get_actors_info', 'get_dwell_times', 'get_emotion_sequences', 'get_emotional_states',
+    'get_human_emotional_states', 'get_interactions_for_all_robots', 'get_interactions_for_robot',
+    'get_performed_interactions', 'get_transition_matrix', 'iter_csv_chunks', 'load_csv', 'parse_dates',
+    'rank_robots_by_transition',
+]
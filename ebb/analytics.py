@@ -0,0 +1,378 @@
+import numpy as np
+import pandas as pd
+
+from .browse import rows_at
+
+# Columnas del resumen de interacciones y estados emocionales por robot
+INTERACTION_COLUMNS = ['Robot', 'Interaction', 'DateInteraction', 'EmotionalState', 'DateEmotionalState']
+
+# Columnas de los estados emocionales de los humanos
+HUMAN_EMOTION_COLUMNS = ['Human', 'Interaction', 'DateInteraction', 'EmotionalState', 'DateEmotionalState']
+
+# Columnas del resumen por actor
+ACTOR_SUMMARY_COLUMNS = ['Performed', 'Received', 'EmotionalStates', 'FirstDate', 'LastDate']
+
+# Columnas de la secuencia de estados emocionales de cada actor
+EMOTION_SEQUENCE_COLUMNS = ['Actor', 'ActorType', 'Interaction', 'EmotionalState', 'Date', 'PreviousState', 'Dwell']
+
+# Columnas del ranking de robots por transiciones de los humanos a un estado
+TRANSITION_RANKING_COLUMNS = ['Transitions', 'Tipped', 'Rate']
+
+
+# Primer código de 'value' para cada código de 'key' entre las filas con la
+# etiqueta indicada; con 'keys' solo se consultan esos códigos de 'key'
+def _first_by(store, label, key, value, keys=None):
+    if keys is None:
+        positions = store.positions(label=label)
+    else:
+        positions = store.positions_in(label, **{key: keys})
+    rows = pd.DataFrame({
+        key: store.column_codes(key)[positions],
+        value: store.column_codes(value)[positions]
+    })
+    rows = rows[rows[key] >= 0]
+    return rows.drop_duplicates(key)
+
+
+# Decodifica una columna de códigos resultado de un merge (NaN si no hubo coincidencia)
+def _decode_column(store, codes):
+    return store.decode(codes.fillna(-1).to_numpy(dtype=np.int64))
+
+
+# Interacciones (performedBy / objectOfAction) de cada robot junto con su fecha,
+# el estado emocional que causaron y la fecha de ese estado.
+# Se resuelve con joins sobre los códigos de las tripletas de cada etiqueta:
+# performedBy/objectOfAction ⋈ causedBy ⋈ hasEmotionalState; las fechas son
+# las ya convertidas a datetime por el almacén. Con una lista de robots solo
+# se consultan en los índices las filas de esos robots y sus interacciones
+def get_interactions_for_all_robots(store, robots=None):
+    subset = robots is not None
+    if robots is None:
+        robots = store.nodes_of_type('Robot')
+    robot_codes = pd.unique(np.array([store.encode(robot) for robot in robots], dtype=np.int64))
+    robot_codes = pd.Index(robot_codes[robot_codes >= 0])
+
+    # Enlaces interacción -> robot, en el orden del CSV
+    if subset:
+        positions = np.sort(np.concatenate([
+            store.positions_in('performedBy', node2=robot_codes),
+            store.positions_in('objectOfAction', node2=robot_codes)
+        ]))
+    else:
+        positions = np.sort(np.concatenate([
+            store.positions(label='performedBy'),
+            store.positions(label='objectOfAction')
+        ]))
+    links = pd.DataFrame({
+        'Robot': store.codes2[positions],
+        'Interaction': store.codes1[positions]
+    })
+
+    # Quedarse con los robots pedidos y agruparlos en su orden de aparición
+    rank = robot_codes.get_indexer(links['Robot'])
+    links = links[rank >= 0]
+    links = links.iloc[np.argsort(rank[rank >= 0], kind='stable')]
+
+    caused = _first_by(store, 'causedBy', 'node2', 'node1', links['Interaction'] if subset else None)
+    states = _first_by(store, 'hasEmotionalState', 'node1', 'node2', caused['node1'] if subset else None)
+
+    result = links.merge(
+        caused.rename(columns={'node2': 'Interaction', 'node1': 'StateNode'}),
+        on='Interaction', how='left'
+    )
+    result = result.merge(
+        states.rename(columns={'node1': 'StateNode', 'node2': 'EmotionalState'}),
+        on='StateNode', how='left'
+    )
+
+    return pd.DataFrame({
+        'Robot': _decode_column(store, result['Robot']),
+        'Interaction': _decode_column(store, result['Interaction']),
+        'DateInteraction': store.node_dates(result['Interaction'].to_numpy()),
+        'EmotionalState': _decode_column(store, result['EmotionalState']),
+        'DateEmotionalState': store.node_dates(result['StateNode'].fillna(-1).to_numpy(dtype=np.int64))
+    }, columns=INTERACTION_COLUMNS)
+
+
+# Interacciones de un único robot con el mismo formato
+def get_interactions_for_robot(store, selected_robot):
+    return get_interactions_for_all_robots(store, robots=[selected_robot])
+
+
+# Filas performedBy de las interacciones (nodos de tipo Action) que realizó un actor
+def get_performed_interactions(store, actor):
+    actions = store.codes1[store.positions(label='type', node2='Action')]
+    positions = store.positions(label='performedBy', node2=actor)
+    return rows_at(store, positions[np.isin(store.codes1[positions], actions)])
+
+
+# Número de interacciones distintas que realizó un actor
+def count_performed_interactions(store, actor):
+    return get_performed_interactions(store, actor)['node1'].nunique()
+
+
+# Pares (interacción, actor) de una relación, solo para nodos de tipo Action.
+# Con 'actors' (códigos) solo se consultan las filas de esos actores
+def _action_links(store, label, actors=None):
+    if actors is None:
+        positions = store.positions(label=label)
+        actions = store.codes1[store.positions(label='type', node2='Action')]
+    else:
+        positions = store.positions_in(label, node2=actors)
+        types = store.positions_in('type', node1=store.codes1[positions])
+        actions = store.codes1[types[store.codes2[types] == store.encode('Action')]]
+    links = pd.DataFrame({
+        'Interaction': store.codes1[positions],
+        'Actor': store.codes2[positions]
+    })
+    return links[links['Interaction'].isin(actions)].drop_duplicates()
+
+
+# Resumen de cada robot y humano, calculado de una vez para todo el fichero:
+# interacciones que realizó (Performed) y que recibió (Received), número de
+# estados emocionales distintos, propios o causados por sus interacciones, y
+# fechas de su primera y última interacción. Indexado por el nombre del actor.
+# Con una lista de actores solo se calculan sus filas (p. ej. los afectados
+# por filas nuevas), consultando los índices en lugar de recorrer cada relación
+def get_actor_summary(store, actors=None):
+    if actors is None:
+        codes = np.concatenate([
+            store.codes1[store.positions(label='type', node2=actor_type)] for actor_type in ('Robot', 'Human')
+        ])
+    else:
+        codes = np.array([store.encode(actor) for actor in actors], dtype=np.int64)
+        codes = codes[codes >= 0]
+    subset = actors is not None
+    actors = pd.Index(pd.unique(codes))
+
+    performed = _action_links(store, 'performedBy', actors if subset else None)
+    received = _action_links(store, 'objectOfAction', actors if subset else None)
+    involved = pd.concat([performed, received]).drop_duplicates()
+
+    dated = involved.assign(Date=store.node_dates(involved['Interaction'].to_numpy()))
+
+    # Estados emocionales causados por las interacciones del actor y los asignados directamente
+    caused = _first_by(store, 'causedBy', 'node2', 'node1', involved['Interaction'] if subset else None)
+    caused = caused.rename(columns={'node2': 'Interaction', 'node1': 'StateNode'})
+    states = _first_by(store, 'hasEmotionalState', 'node1', 'node2', caused['StateNode'] if subset else None)
+    states = states.rename(columns={'node1': 'StateNode', 'node2': 'EmotionalState'})
+    positions = store.positions_in('hasEmotionalState', node1=actors) if subset else store.positions(label='hasEmotionalState')
+    emotions = pd.concat([
+        involved.merge(caused, on='Interaction').merge(states, on='StateNode')[['Actor', 'EmotionalState']],
+        pd.DataFrame({'Actor': store.codes1[positions], 'EmotionalState': store.codes2[positions]})
+    ]).drop_duplicates()
+
+    summary = pd.DataFrame({
+        'Performed': performed.groupby('Actor').size().reindex(actors, fill_value=0),
+        'Received': received.groupby('Actor').size().reindex(actors, fill_value=0),
+        'EmotionalStates': emotions.groupby('Actor').size().reindex(actors, fill_value=0)
+    }, index=actors)
+    summary['FirstDate'] = dated.groupby('Actor')['Date'].min().reindex(actors)
+    summary['LastDate'] = dated.groupby('Actor')['Date'].max().reindex(actors)
+    summary.index = pd.Index(store.decode(actors.to_numpy()), dtype=object)
+    return summary
+
+
+# Estados emocionales de los humanos en una sola extracción agrupada: los que
+# causaron las interacciones en las que participa cada humano (interacción ⋈
+# causedBy ⋈ hasEmotionalState, con la fecha de la interacción y la del
+# estado) y los asignados directamente al humano, sin interacción ni fechas,
+# que no repiten uno causado. Cada estado aparece una vez, en el orden de su
+# fila hasEmotionalState
+def get_human_emotional_states(store, humans=None):
+    if humans is None:
+        humans = store.nodes_of_type('Human')
+    codes = pd.unique(np.array([store.encode(human) for human in humans], dtype=np.int64))
+    codes = pd.Index(codes[codes >= 0])
+
+    positions = np.concatenate([store.positions_in(label, node2=codes) for label in ('performedBy', 'objectOfAction')])
+    links = pd.DataFrame({
+        'Human': store.codes2[positions],
+        'Interaction': store.codes1[positions]
+    }).drop_duplicates()
+
+    positions = store.positions_in('causedBy', node2=links['Interaction'])
+    caused = pd.DataFrame({'StateNode': store.codes1[positions], 'Interaction': store.codes2[positions]})
+    positions = store.positions_in('hasEmotionalState', node1=caused['StateNode'])
+    states = pd.DataFrame({
+        'StateNode': store.codes1[positions],
+        'EmotionalState': store.codes2[positions],
+        'Position': positions
+    })
+
+    caused = links.merge(caused, on='Interaction').merge(states, on='StateNode')
+
+    # Un estado directo del humano que repite uno ya causado (mismo humano y
+    # mismo estado) es el mismo evento registrado dos veces: solo se conservan
+    # los que exceden el número de estados causados de cada par
+    positions = store.positions_in('hasEmotionalState', node1=codes)
+    direct = pd.DataFrame({
+        'Human': store.codes1[positions],
+        'Interaction': -1,
+        'StateNode': -1,
+        'EmotionalState': store.codes2[positions],
+        'Position': positions
+    })
+    covered = caused.groupby(['Human', 'EmotionalState']).size().rename('Covered').reset_index()
+    direct = direct.merge(covered, on=['Human', 'EmotionalState'], how='left')
+    repeated = direct.groupby(['Human', 'EmotionalState']).cumcount() < direct['Covered'].fillna(0)
+    direct = direct[~repeated].drop(columns='Covered')
+
+    result = pd.concat([caused, direct]).drop_duplicates()
+    rank = codes.get_indexer(result['Human'])
+    result = result.iloc[np.lexsort((result['Position'].to_numpy(), rank))]
+
+    return pd.DataFrame({
+        'Human': store.decode(result['Human'].to_numpy()),
+        'Interaction': store.decode(result['Interaction'].to_numpy()),
+        'DateInteraction': store.node_dates(result['Interaction'].to_numpy()),
+        'EmotionalState': store.decode(result['EmotionalState'].to_numpy()),
+        'DateEmotionalState': store.node_dates(result['StateNode'].to_numpy())
+    }, columns=HUMAN_EMOTION_COLUMNS)
+
+
+# Secuencia de estados emocionales fechados de cada robot y cada humano,
+# extraída para todos los actores a la vez: los estados causados por las
+# interacciones en las que participa el actor (interacción ⋈ causedBy ⋈
+# hasEmotionalState), ordenados por la fecha del nodo de estado y, a igual
+# fecha, por su fila hasEmotionalState. Cada fila lleva el estado anterior del
+# mismo actor (PreviousState) y el tiempo que pasó en el estado hasta el
+# siguiente (Dwell; NaT en el último). Los estados sin fecha no se pueden
+# ordenar y se omiten
+def get_emotion_sequences(store):
+    actors, types = [], []
+    for actor_type in ('Robot', 'Human'):
+        codes = store.codes1[store.positions(label='type', node2=actor_type)]
+        actors.append(codes)
+        types.append(np.full(len(codes), actor_type, dtype=object))
+    actors = pd.Index(np.concatenate(actors))
+    types = np.concatenate(types)
+    first = ~actors.duplicated()
+    actors, types = actors[first], types[first]
+
+    positions = np.concatenate([store.positions(label=label) for label in ('performedBy', 'objectOfAction')])
+    links = pd.DataFrame({
+        'Actor': store.codes2[positions],
+        'Interaction': store.codes1[positions]
+    })
+    links = links[actors.get_indexer(links['Actor']) >= 0].drop_duplicates()
+
+    positions = store.positions(label='causedBy')
+    caused = pd.DataFrame({'StateNode': store.codes1[positions], 'Interaction': store.codes2[positions]})
+    positions = store.positions(label='hasEmotionalState')
+    states = pd.DataFrame({
+        'StateNode': store.codes1[positions],
+        'EmotionalState': store.codes2[positions],
+        'Position': positions
+    }).drop_duplicates('StateNode')
+
+    events = links.merge(caused, on='Interaction').merge(states, on='StateNode')
+    return build_emotion_sequences(pd.DataFrame({
+        'Actor': store.decode(events['Actor'].to_numpy()),
+        'ActorType': types[actors.get_indexer(events['Actor'])],
+        'Interaction': store.decode(events['Interaction'].to_numpy()),
+        'EmotionalState': store.decode(events['EmotionalState'].to_numpy()),
+        'Date': store.node_dates(events['StateNode'].to_numpy()),
+        'Order': events['Position'].to_numpy()
+    }), actors=store.decode(actors.to_numpy()))
+
+
+# Secuencias de estados emocionales a partir de los eventos ya extraídos
+# (Actor, ActorType, Interaction, EmotionalState, Date y Order, que desempata
+# los de igual fecha), venga de donde venga la extracción. Se ordenan todos
+# los actores a la vez, en el orden de 'actors' (o de aparición), y el estado
+# anterior y la permanencia salen de comparar cada fila con la siguiente
+def build_emotion_sequences(events, actors=None):
+    events = events[events['Date'].notnull()]
+    if actors is None:
+        rank = pd.factorize(events['Actor'])[0]
+    else:
+        rank = pd.Index(actors).get_indexer(events['Actor'])
+    states, names = pd.factorize(events['EmotionalState'])
+    dates = pd.to_datetime(events['Date']).to_numpy()
+    order = np.lexsort((events['Order'].to_numpy(), dates, rank))
+    rank, states, dates = rank[order], states[order], dates[order]
+    events = events.iloc[order]
+
+    # Filas consecutivas del mismo actor: la anterior aporta el estado previo
+    # y la siguiente marca el final de la permanencia en el estado
+    same = rank[1:] == rank[:-1]
+    previous = np.full(len(states), -1, dtype=np.int64)
+    previous[1:][same] = states[:-1][same]
+    dwell = np.full(len(dates), np.timedelta64('NaT'), dtype=dates.dtype.str.replace('M', 'm'))
+    dwell[:-1][same] = dates[1:][same] - dates[:-1][same]
+
+    return pd.DataFrame({
+        'Actor': events['Actor'].to_numpy(),
+        'ActorType': events['ActorType'].to_numpy(),
+        'Interaction': events['Interaction'].to_numpy(),
+        'EmotionalState': events['EmotionalState'].to_numpy(),
+        'Date': dates,
+        'PreviousState': np.where(previous >= 0, np.asarray(names, dtype=object)[previous], None),
+        'Dwell': dwell
+    }, columns=EMOTION_SEQUENCE_COLUMNS)
+
+
+# Matriz de transiciones entre estados emocionales (filas: estado anterior,
+# columnas: estado siguiente) de las secuencias de get_emotion_sequences;
+# con 'actor' solo se cuentan las de ese actor
+def get_transition_matrix(sequences, actor=None):
+    if actor is not None:
+        sequences = sequences[sequences['Actor'] == actor]
+    transitions = sequences[sequences['PreviousState'].notnull()]
+    matrix = pd.crosstab(transitions['PreviousState'], transitions['EmotionalState'])
+    states = matrix.index.union(matrix.columns)
+    matrix = matrix.reindex(index=states, columns=states, fill_value=0)
+    return matrix.rename_axis(index='From', columns='To')
+
+
+# Distribución del tiempo de permanencia en cada estado emocional de cada actor:
+# número de permanencias acabadas, media, mediana, mínimo y máximo
+def get_dwell_times(sequences, actor=None):
+    if actor is not None:
+        sequences = sequences[sequences['Actor'] == actor]
+    dwell = sequences[sequences['Dwell'].notnull()]
+    return dwell.groupby(['Actor', 'EmotionalState'], sort=False)['Dwell'].agg(
+        ['count', 'mean', 'median', 'min', 'max']
+    ).rename(columns=str.capitalize)
+
+
+# Robots ordenados por cuántas veces sus interacciones llevaron a un humano
+# al estado 'target' desde otro distinto (Tipped), junto con el número de
+# cambios de estado de los humanos que causaron (Transitions) y la proporción
+# entre ambos (Rate). Se calcula uniendo por interacción las secuencias de los
+# humanos con las filas de los robots que participaron en ellas
+def rank_robots_by_transition(sequences, target='Angry'):
+    humans = sequences[(sequences['ActorType'] == 'Human') & sequences['PreviousState'].notnull()]
+    robots = sequences.loc[sequences['ActorType'] == 'Robot', ['Actor', 'Interaction']].drop_duplicates()
+    transitions = humans[['Interaction', 'EmotionalState', 'PreviousState']].merge(robots, on='Interaction')
+    tipped = (transitions['EmotionalState'] == target) & (transitions['PreviousState'] != target)
+
+    ranking = pd.DataFrame({
+        'Transitions': transitions.groupby('Actor').size(),
+        'Tipped': tipped.groupby(transitions['Actor']).sum()
+    })
+    ranking = ranking.reindex(pd.Index(robots['Actor'].unique(), dtype=object), fill_value=0)
+    ranking['Rate'] = ranking['Tipped'] / ranking['Transitions'].where(ranking['Transitions'] > 0)
+    ranking.index.name = 'Robot'
+    return ranking.sort_values(['Tipped', 'Rate'], ascending=False, kind='stable')[TRANSITION_RANKING_COLUMNS]
+
+
+# Tipo y nombre (label) de cada nodo del tipo indicado ('Robot' o 'Human')
+def get_actors_info(store, actor_type):
+    results = []
+    for actor in store.nodes_of_type(actor_type):
+        results.append((actor, store.first_object(actor, 'type'), store.first_object(actor, 'label')))
+    return pd.DataFrame(results, columns=[actor_type, 'Label Value', 'name'])
+
+
+# Interacciones que causaron un estado emocional (la fecha ya es datetime)
+def get_emotional_states(result_data):
+    return result_data[result_data['EmotionalState'].notnull()]
+
+
+# Número de apariciones de cada estado emocional
+def count_emotional_states(emotional_data):
+    emotional_count = emotional_data['EmotionalState'].value_counts().reset_index()
+    emotional_count.columns = ['EmotionalState', 'Count']
+    return emotional_count
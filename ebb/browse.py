@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from .store import COLUMNS
+
+# Filas por página (o por muestra) que se ofrecen en la tabla de tripletas
+PAGE_SIZES = (25, 50, 100, 500)
+
+
+# Códigos del vocabulario cuyo valor contiene el texto, sin distinguir mayúsculas
+def _matching_codes(store, text):
+    values = pd.Series(store.vocabulary, dtype=object).astype(str)
+    return np.flatnonzero(values.str.contains(text, case=False, regex=False).to_numpy())
+
+
+# Posiciones de las filas cuyos node1, label y node2 contienen los textos
+# indicados ('' o None no filtra), o None si no hay ningún filtro y valen todas.
+# Cada filtro se evalúa una vez por valor del vocabulario y después solo se
+# comparan códigos enteros, sin decodificar las filas
+def filter_rows(store, node1=None, label=None, node2=None):
+    mask = None
+    for column, text in zip(COLUMNS, (node1, label, node2)):
+        if not text:
+            continue
+        # El último elemento corresponde al código -1 (valor vacío), que no coincide
+        allowed = np.zeros(len(store.vocabulary) + 1, dtype=bool)
+        allowed[_matching_codes(store, text)] = True
+        column_mask = allowed[store.column_codes(column)]
+        mask = column_mask if mask is None else mask & column_mask
+    return None if mask is None else np.flatnonzero(mask)
+
+
+# Tripletas decodificadas de las posiciones indicadas, indexadas por su número de fila
+def rows_at(store, positions):
+    return pd.DataFrame(
+        {column: store.decode(store.column_codes(column)[positions]) for column in COLUMNS},
+        index=pd.Index(positions, name='row')
+    )
+
+
+# Página 'page' (desde 0) de las filas seleccionadas por filter_rows
+def page_rows(store, positions, page, page_size):
+    start = page * page_size
+    if positions is None:
+        window = np.arange(start, min(start + page_size, len(store)))
+    else:
+        window = positions[start:start + page_size]
+    return rows_at(store, window)
+
+
+# Muestra aleatoria de hasta n filas seleccionadas, en orden de fila
+def sample_rows(store, positions, n, seed=0):
+    total = len(store) if positions is None else len(positions)
+    picked = np.sort(np.random.default_rng(seed).choice(total, size=min(n, total), replace=False))
+    return rows_at(store, picked if positions is None else positions[picked])
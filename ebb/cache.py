@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# Huella del contenido de un fichero subido: el mismo CSV da la misma clave
+# aunque se suba de nuevo o desde otra sesión
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+# Caché LRU compartida entre sesiones con los almacenes ya construidos.
+# Se limita por número de entradas y por memoria (max_bytes=None sin límite);
+# la entrada más reciente se conserva aunque por sí sola supere el presupuesto.
+class DatasetCache:
+
+    def __init__(self, max_entries=8, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = getattr(value, 'nbytes', 0)
+        with self._lock:
+            self._entries[key] = (value, size)
+            self._entries.move_to_end(key)
+            self._evict()
+        return value
+
+    # Devuelve la entrada cacheada o la construye con build() y la guarda
+    def get_or_build(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, build())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            self._entries.popitem(last=False)
@@ -0,0 +1,128 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Plantilla con la que se construyen las figuras; la que elige el usuario se
+# aplica después como un cambio del layout
+BASE_TEMPLATE = 'plotly_dark'
+
+# Tipos de gráfica de emociones
+CHART_TIME = 'time'
+CHART_COUNT = 'count'
+
+# Eventos visibles a partir de los cuales se agrupan por intervalos de tiempo.
+# El rango de fechas visible se divide entonces en tantos intervalos como
+# quepan en MAX_POINTS puntos, entre MIN_BUCKETS y MAX_BUCKETS
+MAX_POINTS = 5000
+MIN_BUCKETS = 50
+MAX_BUCKETS = 500
+
+# Puntos a partir de los cuales se dibuja con WebGL (Scattergl) en lugar de SVG
+WEBGL_THRESHOLD = 1000
+
+
+# Color de cada valor (robot o emoción) en el orden en que aparecen
+def color_map(values):
+    return dict(zip(values, px.colors.qualitative.Plotly[:len(values)]))
+
+
+# Rango de fechas (inicio, fin) de los estados emocionales, o None si no hay fechas
+def date_bounds(emotional_data):
+    dates = emotional_data['DateEmotionalState'].dropna()
+    if dates.empty:
+        return None
+    return dates.min(), dates.max()
+
+
+# Estados emocionales agrupados en intervalos de 'width' desde 'start'. Cada
+# punto lleva la fecha de la primera aparición del estado en el intervalo, el
+# número de apariciones ('Count') y el de eventos del robot en el intervalo
+# ('Events'). Con all_states se conserva un punto por robot, intervalo y
+# estado; si no, solo el estado más frecuente (la moda) de cada robot e intervalo
+def bucket_emotions(emotional_data, start, width, all_states=True):
+    data = emotional_data.sort_values('DateEmotionalState', kind='stable')
+    buckets = (data['DateEmotionalState'] - start) // width
+    reduced = (
+        data.assign(Bucket=buckets)
+        .groupby(['Robot', 'Bucket', 'EmotionalState'], sort=False, observed=True)
+        .agg(DateEmotionalState=('DateEmotionalState', 'first'), Count=('DateEmotionalState', 'size'))
+        .reset_index()
+    )
+    reduced['Events'] = reduced.groupby(['Robot', 'Bucket'], sort=False)['Count'].transform('sum')
+    if not all_states:
+        reduced = (
+            reduced.sort_values('Count', ascending=False, kind='stable')
+            .drop_duplicates(['Robot', 'Bucket'])
+        )
+    return reduced.sort_values(['Robot', 'DateEmotionalState'], kind='stable').drop(columns='Bucket')
+
+
+# Estados emocionales a lo largo del tiempo dentro de 'date_range' (todo el
+# rango si es None). Con color='Robot' se unen con una línea los de cada
+# robot; con color='EmotionalState' se muestran como puntos. Si hay más de
+# MAX_POINTS eventos visibles se agrupan por intervalos del rango (la línea de
+# cada robot pasa por su estado más frecuente en cada uno), de modo que el
+# ancho del intervalo sigue al rango elegido
+def emotions_over_time(emotional_data, color, colors, date_range=None):
+    data = emotional_data.dropna(subset=['DateEmotionalState'])
+    visible = date_bounds(data) if date_range is None else date_range
+    title = 'Emotional States Over Time'
+    hover_data = None
+    if visible is not None:
+        start, end = visible
+        dates = data['DateEmotionalState']
+        data = data[(dates >= start) & (dates <= end)]
+        if len(data) > MAX_POINTS:
+            series = data[color].nunique()
+            buckets = min(max(MAX_POINTS // max(series, 1), MIN_BUCKETS), MAX_BUCKETS)
+            width = max((end - start) / buckets, pd.Timedelta(seconds=1)).ceil('s')
+            total = len(data)
+            data = bucket_emotions(data, start, width, all_states=color != 'Robot')
+            title += f"<br><sup>{total:,} events grouped into {format_width(width)} intervals</sup>"
+            hover_data = ['Count', 'Events']
+
+    plot = px.line if color == 'Robot' else px.scatter
+    options = {'markers': True} if color == 'Robot' else {}
+    fig = plot(data, x='DateEmotionalState', y='EmotionalState',
+               title=title,
+               labels={'DateEmotionalState': 'Date', 'EmotionalState': 'Emotional State'},
+               color=color,
+               color_discrete_map=colors,
+               hover_data=hover_data,
+               render_mode='webgl' if len(data) > WEBGL_THRESHOLD else 'svg',
+               template=BASE_TEMPLATE,
+               **options)
+
+    fig.update_traces(marker=dict(size=10), selector=dict(mode='markers'))
+    fig.update_layout(xaxis_title='Date', yaxis_title='Emotional State', showlegend=False)
+    if date_range is not None:
+        fig.update_xaxes(range=list(date_range))
+    return fig
+
+
+# Ancho de intervalo legible, p. ej. '2h 30min' o '45s'
+def format_width(width):
+    components = width.components
+    parts = [(components.days, 'd'), (components.hours, 'h'), (components.minutes, 'min'), (components.seconds, 's')]
+    return ' '.join(f"{value}{unit}" for value, unit in parts if value) or '1s'
+
+
+# Recuento de cada estado emocional (con el formato de count_emotional_states)
+def emotion_counts(emotional_count, colors):
+    fig = px.bar(emotional_count, x='EmotionalState', y='Count',
+                 title='Count of Emotional States',
+                 labels={'EmotionalState': 'Emotional State', 'Count': 'Count'},
+                 color='EmotionalState',
+                 color_discrete_map=colors,
+                 template=BASE_TEMPLATE)
+
+    fig.update_layout(xaxis_title='Emotional State', yaxis_title='Count', showlegend=False)
+    return fig
+
+
+# Copia de una figura ya construida con otra plantilla y otra altura. Solo
+# cambia el layout: las trazas se copian tal cual, sin volver a construirlas
+def style_figure(fig, template=None, height=None):
+    styled = go.Figure(fig)
+    styled.update_layout(template=template or BASE_TEMPLATE, height=height)
+    return styled
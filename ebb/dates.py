@@ -0,0 +1,24 @@
+import pandas as pd
+
+# Formato de las fechas de los volcados: ^2024-05-01T10:00:00Z
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Marcas que rodean a algunos literales de fecha: comillas, el '^' inicial y
+# sufijos de tipo como ^^xsd:dateTime
+_DATATYPE = r"\^\^.*$"
+_QUOTES = "'\"^ "
+
+
+# Convierte literales de fecha a datetime64 (sin zona horaria). La mayoría
+# sigue el formato fijo y se convierte de una vez; solo los que no lo cumplen
+# pasan por el análisis tolerante, y los que aun así no son fechas quedan como NaT
+def parse_dates(values):
+    values = pd.Series(values, dtype=object)
+    dates = pd.to_datetime(values.str.lstrip('^'), format=DATE_FORMAT, errors='coerce')
+
+    malformed = dates.isna() & values.notna()
+    if malformed.any():
+        text = values[malformed].astype(str).str.replace(_DATATYPE, '', regex=True).str.strip(_QUOTES)
+        retry = pd.to_datetime(text, format='mixed', errors='coerce', utc=True).dt.tz_localize(None)
+        dates[malformed] = retry.astype(dates.dtype)
+    return dates
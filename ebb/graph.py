@@ -0,0 +1,270 @@
+import html
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Máximo de nodos que se envían al navegador; por encima se muestra una vista reducida
+MAX_GRAPH_NODES = 1500
+MAX_GRAPH_LINKS = 5000
+
+_LANGUAGE_TAG = re.compile(r"@[A-Za-z-]+$")
+
+# Plantilla de graph.html; el JSON del grafo se inserta en __GRAPH_DATA__
+GRAPH_TEMPLATE = """<head>
+<style> body { margin: 0; } </style>
+<script src="https://cdn.jsdelivr.net/npm/d3-color@3"></script>
+<script src="https://cdn.jsdelivr.net/npm/d3-interpolate@3"></script>
+<script src="https://cdn.jsdelivr.net/npm/d3-scale-chromatic@3"></script>
+<script src="https://cdn.jsdelivr.net/npm/d3-scale@4"></script>
+<script src="https://unpkg.com/force-graph"></script>
+</head>
+<body>
+<div id="graph"></div>
+<script>
+const j = __GRAPH_DATA__;
+const Graph = ForceGraph()
+(document.getElementById('graph'))
+  .graphData(j)
+  .nodeId('id')
+  .nodeLabel('tooltip')
+  .nodeVal('size')
+  .nodeAutoColorBy('group')
+  .linkWidth((link) => link.width)
+  .nodeCanvasObject((node, ctx, globalScale) => {
+    const label = node.label;
+    const fontSize = 12/globalScale;
+    ctx.font = `${fontSize}px Sans-Serif`;
+    const textWidth = ctx.measureText(label).width;
+    const bckgDimensions = [textWidth, fontSize].map(n => n + fontSize * 0.2); // some padding
+
+    ctx.fillStyle = 'rgba(255, 255, 255, 0.8)';
+    ctx.fillRect(node.x - bckgDimensions[0] / 2, node.y - 10 - bckgDimensions[1] / 2, ...bckgDimensions);
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'middle';
+
+    ctx.fillStyle = (node.color);
+
+    ctx.fillText(label, node.x, node.y - 10);
+
+    ctx.beginPath(); ctx.arc(node.x, node.y, node.size, 0, 2 * Math.PI, false);  ctx.fill();
+    node.__bckgDimensions = bckgDimensions; // to re-use in nodePointerAreaPaint
+  })
+  .linkColor((link) => link.color);
+</script>
+</body>"""
+
+
+# Texto que se muestra para un nodo: sin la etiqueta de idioma de los literales ('Ari'@en)
+def node_label(node):
+    return _LANGUAGE_TAG.sub('', str(node))
+
+
+# Niveles de detalle del grafo
+ZOOM_ACTORS = 0       # solo robots y humanos, con sus interacciones agregadas
+ZOOM_CLUSTERS = 1     # además, un nodo por actor que agrupa las interacciones que realizó
+ZOOM_FULL = 2         # todas las entidades (interacciones, estados emocionales...)
+ZOOM_LEVELS = (ZOOM_ACTORS, ZOOM_CLUSTERS, ZOOM_FULL)
+
+ACTOR_TYPES = ('Robot', 'Human')
+
+# Relaciones cuyo objeto es un literal que se muestra como propiedad del sujeto
+LITERAL_LABELS = ('label', 'comment', 'date')
+_LITERAL_VALUE = re.compile(r"^('.*'(@[A-Za-z-]+)?|\^.*)$")
+
+
+# Valores que son literales (fechas ^..., cadenas entre comillas) y no entidades.
+# Una tripleta es literal si su relación está en LITERAL_LABELS o su objeto lo es
+def literal_values(values):
+    return pd.Series(values, dtype=object).astype(str).str.match(_LITERAL_VALUE).to_numpy()
+
+
+# Identificador del nodo que agrupa las interacciones de un actor
+def cluster_id(actor):
+    return f"{actor} interactions"
+
+
+# Tripletas clasificadas del almacén: tipo de cada nodo, propiedades literales y
+# relaciones entre entidades, todo en códigos
+class _GraphTriples:
+
+    def __init__(self, store):
+        self.store = store
+        valid = (store.codes1 >= 0) & (store.codes_label >= 0) & (store.codes2 >= 0)
+        sources = store.codes1[valid].astype(np.int64)
+        labels = store.codes_label[valid].astype(np.int64)
+        targets = store.codes2[valid].astype(np.int64)
+
+        literal_codes = literal_values(store.vocabulary)
+        literal_labels = [store.encode(label) for label in LITERAL_LABELS]
+        type_rows = labels == store.encode('type')
+        literal_rows = ~type_rows & (np.isin(labels, literal_labels) | literal_codes[targets])
+        entity_rows = ~type_rows & ~literal_rows
+
+        types = pd.DataFrame({'node': sources[type_rows], 'type': targets[type_rows]})
+        self.types = types.drop_duplicates('node').set_index('node')['type']
+        self.literals = pd.DataFrame({
+            'node': sources[literal_rows], 'label': labels[literal_rows], 'value': targets[literal_rows]
+        }).drop_duplicates(['node', 'label'])
+        self.edges = pd.DataFrame({
+            'source': sources[entity_rows], 'label': labels[entity_rows], 'target': targets[entity_rows]
+        })
+
+        actor_types = [store.encode(actor_type) for actor_type in ACTOR_TYPES]
+        self.actors = self.types.index[self.types.isin(actor_types)].to_numpy()
+
+        # Interacción -> actor que la realiza / actor que la recibe
+        self.performed = self._relation('performedBy').drop_duplicates('source')
+        self.received = self._relation('objectOfAction').drop_duplicates('source')
+
+    def _relation(self, label):
+        return self.edges.loc[self.edges['label'] == self.store.encode(label), ['source', 'target']]
+
+    # Relaciones entre entidades alrededor de unas interacciones: las que salen
+    # de ellas, las que llegan (causedBy) y las de los nodos que las apuntan
+    def around(self, interactions):
+        edges = self.edges
+        touching = edges['source'].isin(interactions) | edges['target'].isin(interactions)
+        pointing = edges.loc[edges['target'].isin(interactions), 'source']
+        return edges[touching | edges['source'].isin(pointing)]
+
+    def decode(self, codes):
+        return self.store.decode(np.asarray(codes, dtype=np.int64))
+
+
+# Aristas (source, label, target, weight) de cada nivel de detalle; los nodos son
+# códigos del vocabulario salvo los de agrupación, que son cadenas
+def _level_edges(triples, zoom, expand):
+    store = triples.store
+    if zoom == ZOOM_FULL:
+        edges = triples.edges.assign(weight=1)
+        return _decoded(triples, edges)
+
+    pairs = triples.performed.merge(triples.received, on='source', suffixes=('_by', '_of'))
+    if zoom == ZOOM_ACTORS:
+        edges = pairs.groupby(['target_by', 'target_of'], sort=False).size().reset_index(name='weight')
+        edges = pd.DataFrame({
+            'source': triples.decode(edges['target_by']),
+            'label': 'interactsWith',
+            'target': triples.decode(edges['target_of']),
+            'weight': edges['weight']
+        })
+        return edges
+
+    # Agrupaciones por actor; las que se piden en 'expand' se muestran abiertas
+    expanded = np.array([store.encode(actor) for actor in expand], dtype=np.int64)
+    performed = triples.performed[~triples.performed['target'].isin(expanded)]
+    counts = performed.groupby('target', sort=False).size()
+    by_actor = pd.DataFrame({
+        'source': [cluster_id(actor) for actor in triples.decode(counts.index)],
+        'label': 'performedBy',
+        'target': triples.decode(counts.index),
+        'weight': counts.to_numpy()
+    })
+    objects = pairs[~pairs['target_by'].isin(expanded)]
+    objects = objects.groupby(['target_by', 'target_of'], sort=False).size().reset_index(name='weight')
+    to_object = pd.DataFrame({
+        'source': [cluster_id(actor) for actor in triples.decode(objects['target_by'])],
+        'label': 'objectOfAction',
+        'target': triples.decode(objects['target_of']),
+        'weight': objects['weight']
+    })
+
+    interactions = triples.performed.loc[triples.performed['target'].isin(expanded), 'source']
+    opened = _decoded(triples, triples.around(interactions).assign(weight=1))
+    return pd.concat([by_actor, to_object, opened], ignore_index=True)
+
+
+def _decoded(triples, edges):
+    return pd.DataFrame({
+        'source': triples.decode(edges['source']),
+        'label': triples.decode(edges['label']),
+        'target': triples.decode(edges['target']),
+        'weight': edges['weight'].to_numpy()
+    })
+
+
+def _level_nodes(triples, edges, zoom):
+    nodes = pd.unique(np.concatenate([edges['source'].to_numpy(dtype=object), edges['target'].to_numpy(dtype=object)]))
+    if zoom != ZOOM_FULL:
+        # Los actores se muestran aunque no tengan interacciones
+        nodes = pd.unique(np.concatenate([triples.decode(triples.actors), nodes]))
+    return nodes
+
+
+# Datos del grafo (nodos y enlaces) en el formato de force-graph a partir de las
+# tripletas. Los literales (nombres, comentarios, fechas) y el tipo pasan a ser
+# propiedades de su nodo y las interacciones se agrupan por actor según 'zoom';
+# con zoom=None se elige el mayor nivel de detalle que cabe en max_nodes. Si aun
+# así no cabe, se conservan los nodos de mayor grado y los enlaces entre ellos.
+def build_graph(store, zoom=None, expand=(), max_nodes=MAX_GRAPH_NODES, max_links=MAX_GRAPH_LINKS):
+    triples = _GraphTriples(store)
+
+    for level in (ZOOM_FULL, ZOOM_CLUSTERS, ZOOM_ACTORS) if zoom is None else (zoom,):
+        edges = _level_edges(triples, level, expand)
+        nodes = _level_nodes(triples, edges, level)
+        if len(nodes) <= max_nodes:
+            break
+    total_nodes = len(nodes)
+    total_links = len(edges)
+
+    degree = pd.concat([
+        edges.groupby('source', sort=False)['weight'].sum(),
+        edges.groupby('target', sort=False)['weight'].sum()
+    ]).groupby(level=0, sort=False).sum().reindex(nodes, fill_value=0)
+
+    if total_nodes > max_nodes:
+        # Nodos de mayor grado; a igualdad, los que aparecen antes
+        degree = degree.iloc[np.argsort(-degree.to_numpy(), kind='stable')[:max_nodes]]
+        edges = edges[edges['source'].isin(degree.index) & edges['target'].isin(degree.index)]
+    edges = edges.iloc[:max_links]
+
+    links = [
+        {"source": source, "target": target, "label": label,
+         "width": round(1.0 + float(np.log2(weight)), 2), "color": "#000000"}
+        for source, label, target, weight in zip(
+            edges['source'].tolist(), edges['label'].tolist(), edges['target'].tolist(), edges['weight'].tolist()
+        )
+    ]
+
+    codes = np.array([store.encode(node) for node in degree.index], dtype=np.int64)
+    groups = triples.types.reindex(codes)
+    literals = triples.literals[triples.literals['node'].isin(codes)]
+    properties = {}
+    for node, label, value in zip(triples.decode(literals['node']), triples.decode(literals['label']),
+                                  triples.decode(literals['value'])):
+        properties.setdefault(node, {})[label] = node_label(value)
+
+    nodes = []
+    for node, code, weight, group in zip(degree.index, codes, degree.to_numpy(), groups.to_numpy()):
+        size = round(2.0 + float(np.log2(1 + weight)), 2)
+        if code < 0:
+            group_name = 'Cluster'
+        elif pd.isna(group):
+            group_name = None
+        else:
+            group_name = store.decode(int(group))
+        node_properties = properties.get(node, {})
+        # force-graph muestra el tooltip como HTML: los nombres y literales se escapan
+        tooltip = '<br>'.join(html.escape(part) for part in
+                              [node_label(node)] + [f"{key}: {value}" for key, value in node_properties.items()])
+        nodes.append({
+            "id": node, "label": node_label(node), "tooltip": tooltip, "group": group_name,
+            "properties": node_properties, "size": size, "orig_size": size
+        })
+
+    return {
+        "links": links,
+        "nodes": nodes,
+        "zoom": level,
+        "clusters": triples.decode(triples.performed['target'].unique()).tolist(),
+        "total_nodes": total_nodes,
+        "total_links": total_links
+    }
+
+
+# Página HTML del grafo con los datos en JSON compacto
+def graph_html(graph):
+    data = json.dumps(graph, separators=(',', ':')).replace('</', '<\\/')
+    return GRAPH_TEMPLATE.replace('__GRAPH_DATA__', data)
@@ -0,0 +1,384 @@
+import os
+
+import pandas as pd
+from neo4j import GraphDatabase, Result, RoutingControl
+from neo4j.exceptions import DriverError, Neo4jError
+
+from .analytics import (
+    ACTOR_SUMMARY_COLUMNS, HUMAN_EMOTION_COLUMNS, INTERACTION_COLUMNS, build_emotion_sequences
+)
+from .dates import parse_dates
+from .graph import LITERAL_LABELS, literal_values
+
+# Conexión por defecto, la misma base de datos que llena el servicio Flask
+NEO4J_URI = os.environ.get('EBB_NEO4J_URI', 'bolt://localhost:7687')
+NEO4J_USER = os.environ.get('EBB_NEO4J_USER', 'neo4j')
+NEO4J_PASSWORD = os.environ.get('EBB_NEO4J_PASSWORD', '')
+NEO4J_DATABASE = os.environ.get('EBB_NEO4J_DATABASE') or None
+
+# Conexiones que el driver mantiene abiertas y reutiliza entre consultas
+POOL_SIZE = int(os.environ.get('EBB_NEO4J_POOL_SIZE', 10))
+
+# Esquemas del grafo: el genérico guarda cada tripleta como
+# (:Node)-[:RELATION {label}]->(:Node); el tipado convierte cada etiqueta en un
+# tipo de relación, cada tripleta 'type' en una etiqueta del nodo y cada
+# literal (fechas, nombres) en una propiedad del nodo
+SCHEMA_GENERIC = 'generic'
+SCHEMA_TYPED = 'typed'
+NEO4J_SCHEMA = os.environ.get('EBB_NEO4J_SCHEMA', SCHEMA_GENERIC)
+
+# Errores del driver y de la base de datos al consultar
+NEO4J_ERRORS = (DriverError, Neo4jError)
+
+# Relaciones que unen una interacción con sus actores
+ACTOR_LINKS = ['performedBy', 'objectOfAction']
+
+# Consultas sobre el esquema genérico (:Node {id})-[:RELATION {label}]->(:Node {id}).
+# Todos los valores variables van como parámetros, así que Neo4j reutiliza el
+# plan de cada consulta
+NODES_OF_TYPE = """
+MATCH (n:Node)-[:RELATION {label: 'type'}]->(:Node {id: $type})
+RETURN DISTINCT n.id AS id
+ORDER BY id
+"""
+
+ACTORS_INFO = """
+MATCH (n:Node)-[:RELATION {label: 'type'}]->(:Node {id: $type})
+OPTIONAL MATCH (n)-[:RELATION {label: 'label'}]->(name:Node)
+RETURN n.id AS actor, $type AS type, min(name.id) AS name
+ORDER BY actor
+"""
+
+# Interacciones de los robots con su fecha, el estado emocional que causaron
+# (interacción <- causedBy <- nodo de estado -> hasEmotionalState) y su fecha
+ROBOT_INTERACTIONS = """
+MATCH (r:Node)-[:RELATION {label: 'type'}]->(:Node {id: 'Robot'})
+WHERE $robots IS NULL OR r.id IN $robots
+MATCH (i:Node)-[link:RELATION]->(r)
+WHERE link.label IN $links
+OPTIONAL MATCH (i)-[:RELATION {label: 'date'}]->(date:Node)
+WITH r, i, link, min(date.id) AS date_interaction
+OPTIONAL MATCH (s:Node)-[:RELATION {label: 'causedBy'}]->(i)
+WITH r, i, link, date_interaction, head(collect(s)) AS s
+OPTIONAL MATCH (s)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+OPTIONAL MATCH (s)-[:RELATION {label: 'date'}]->(date:Node)
+RETURN r.id AS Robot, i.id AS Interaction, date_interaction AS DateInteraction,
+       min(state.id) AS EmotionalState, min(date.id) AS DateEmotionalState
+ORDER BY Robot, DateInteraction, Interaction
+"""
+
+# Recuento de los estados emocionales causados por las interacciones de los
+# robots, agregado en la base de datos
+EMOTION_COUNTS = """
+MATCH (r:Node)-[:RELATION {label: 'type'}]->(:Node {id: 'Robot'})
+MATCH (i:Node)-[link:RELATION]->(r)
+WHERE link.label IN $links
+MATCH (s:Node)-[:RELATION {label: 'causedBy'}]->(i)
+MATCH (s)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+RETURN state.id AS EmotionalState, count(*) AS Count
+ORDER BY Count DESC, EmotionalState
+"""
+
+# Por actor: interacciones realizadas y recibidas, fechas de sus interacciones
+# y estados emocionales causados por ellas o asignados directamente
+ACTOR_SUMMARY = """
+MATCH (a:Node)-[:RELATION {label: 'type'}]->(type:Node)
+WHERE type.id IN ['Robot', 'Human']
+OPTIONAL MATCH (i:Node)-[link:RELATION]->(a)
+WHERE link.label IN $links AND EXISTS { (i)-[:RELATION {label: 'type'}]->(:Node {id: 'Action'}) }
+OPTIONAL MATCH (i)-[:RELATION {label: 'date'}]->(date:Node)
+OPTIONAL MATCH (s:Node)-[:RELATION {label: 'causedBy'}]->(i)
+OPTIONAL MATCH (s)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+WITH a,
+     count(DISTINCT CASE WHEN link.label = 'performedBy' THEN i END) AS performed,
+     count(DISTINCT CASE WHEN link.label = 'objectOfAction' THEN i END) AS received,
+     collect(DISTINCT date.id) AS dates,
+     collect(DISTINCT state.id) AS caused
+OPTIONAL MATCH (a)-[:RELATION {label: 'hasEmotionalState'}]->(own:Node)
+RETURN a.id AS Actor, performed AS Performed, received AS Received,
+       caused + collect(DISTINCT own.id) AS states, dates
+"""
+
+# Estados emocionales de los humanos: los causados por las interacciones en
+# las que participan y los asignados directamente, sin interacción ni fechas
+HUMAN_EMOTIONAL_STATES = """
+MATCH (h:Node)-[:RELATION {label: 'type'}]->(:Node {id: 'Human'})
+WHERE $humans IS NULL OR h.id IN $humans
+MATCH (i:Node)-[link:RELATION]->(h)
+WHERE link.label IN $links
+MATCH (s:Node)-[:RELATION {label: 'causedBy'}]->(i)
+MATCH (s)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+OPTIONAL MATCH (i)-[:RELATION {label: 'date'}]->(date_interaction:Node)
+OPTIONAL MATCH (s)-[:RELATION {label: 'date'}]->(date_state:Node)
+RETURN h.id AS Human, i.id AS Interaction, min(date_interaction.id) AS DateInteraction,
+       state.id AS EmotionalState, min(date_state.id) AS DateEmotionalState, s.id AS StateNode
+UNION ALL
+MATCH (h:Node)-[:RELATION {label: 'type'}]->(:Node {id: 'Human'})
+WHERE $humans IS NULL OR h.id IN $humans
+MATCH (h)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+RETURN h.id AS Human, null AS Interaction, null AS DateInteraction,
+       state.id AS EmotionalState, null AS DateEmotionalState, null AS StateNode
+"""
+
+# Filas performedBy de las interacciones (nodos de tipo Action) que realizó un actor
+PERFORMED_INTERACTIONS = """
+MATCH (i:Node)-[link:RELATION {label: 'performedBy'}]->(a:Node {id: $actor})
+WHERE EXISTS { (i)-[:RELATION {label: 'type'}]->(:Node {id: 'Action'}) }
+RETURN i.id AS node1, link.label AS label, a.id AS node2
+ORDER BY node1
+"""
+
+# Estados emocionales fechados de cada robot y humano, para ordenarlos en secuencias
+EMOTION_EVENTS = """
+MATCH (a:Node)-[:RELATION {label: 'type'}]->(type:Node)
+WHERE type.id IN ['Robot', 'Human']
+MATCH (i:Node)-[link:RELATION]->(a)
+WHERE link.label IN $links
+MATCH (s:Node)-[:RELATION {label: 'causedBy'}]->(i)
+MATCH (s)-[:RELATION {label: 'hasEmotionalState'}]->(state:Node)
+MATCH (s)-[:RELATION {label: 'date'}]->(date:Node)
+RETURN a.id AS Actor, type.id AS ActorType, i.id AS Interaction,
+       min(state.id) AS EmotionalState, min(date.id) AS Date, s.id AS StateNode
+"""
+
+
+# Las mismas consultas sobre el esquema tipado: las relaciones se recorren por
+# su tipo, los actores se encuentran por su etiqueta y las fechas y los
+# nombres se leen de las propiedades del nodo
+TYPED_ROBOT_INTERACTIONS = """
+MATCH (r:Robot)
+WHERE $robots IS NULL OR r.id IN $robots
+MATCH (i:Node)-[link:performedBy|objectOfAction]->(r)
+OPTIONAL MATCH (s:Node)-[:causedBy]->(i)
+WITH r, i, link, head(collect(s)) AS s
+OPTIONAL MATCH (s)-[:hasEmotionalState]->(state:Node)
+RETURN r.id AS Robot, i.id AS Interaction, i.date AS DateInteraction,
+       min(state.id) AS EmotionalState, s.date AS DateEmotionalState
+ORDER BY Robot, DateInteraction, Interaction
+"""
+
+TYPED_EMOTION_COUNTS = """
+MATCH (:Robot)<-[:performedBy|objectOfAction]-(:Node)<-[:causedBy]-(:Node)-[:hasEmotionalState]->(state:Node)
+RETURN state.id AS EmotionalState, count(*) AS Count
+ORDER BY Count DESC, EmotionalState
+"""
+
+TYPED_ACTOR_SUMMARY = """
+MATCH (a:Node)
+WHERE a:Robot OR a:Human
+OPTIONAL MATCH (i:Action)-[link:performedBy|objectOfAction]->(a)
+OPTIONAL MATCH (s:Node)-[:causedBy]->(i)
+OPTIONAL MATCH (s)-[:hasEmotionalState]->(state:Node)
+WITH a,
+     count(DISTINCT CASE WHEN type(link) = 'performedBy' THEN i END) AS performed,
+     count(DISTINCT CASE WHEN type(link) = 'objectOfAction' THEN i END) AS received,
+     collect(DISTINCT i.date) AS dates,
+     collect(DISTINCT state.id) AS caused
+OPTIONAL MATCH (a)-[:hasEmotionalState]->(own:Node)
+RETURN a.id AS Actor, performed AS Performed, received AS Received,
+       caused + collect(DISTINCT own.id) AS states, dates
+"""
+
+TYPED_HUMAN_EMOTIONAL_STATES = """
+MATCH (h:Human)
+WHERE $humans IS NULL OR h.id IN $humans
+MATCH (h)<-[:performedBy|objectOfAction]-(i:Node)<-[:causedBy]-(s:Node)-[:hasEmotionalState]->(state:Node)
+RETURN DISTINCT h.id AS Human, i.id AS Interaction, i.date AS DateInteraction,
+       state.id AS EmotionalState, s.date AS DateEmotionalState, s.id AS StateNode
+UNION ALL
+MATCH (h:Human)
+WHERE $humans IS NULL OR h.id IN $humans
+MATCH (h)-[:hasEmotionalState]->(state:Node)
+RETURN h.id AS Human, null AS Interaction, null AS DateInteraction,
+       state.id AS EmotionalState, null AS DateEmotionalState, null AS StateNode
+"""
+
+TYPED_PERFORMED_INTERACTIONS = """
+MATCH (i:Action)-[:performedBy]->(a:Node {id: $actor})
+RETURN i.id AS node1, 'performedBy' AS label, a.id AS node2
+ORDER BY node1
+"""
+
+TYPED_EMOTION_EVENTS = """
+MATCH (a:Node)
+WHERE a:Robot OR a:Human
+MATCH (a)<-[:performedBy|objectOfAction]-(i:Node)<-[:causedBy]-(s:Node)-[:hasEmotionalState]->(state:Node)
+WHERE s.date IS NOT NULL
+RETURN a.id AS Actor, CASE WHEN a:Robot THEN 'Robot' ELSE 'Human' END AS ActorType, i.id AS Interaction,
+       min(state.id) AS EmotionalState, s.date AS Date, s.id AS StateNode
+"""
+
+
+# Consultas de análisis respondidas por Neo4j en lugar de por el almacén de
+# tripletas local. Devuelven tablas con el mismo formato que las funciones de
+# ebb.analytics, de modo que las páginas las muestran igual; los joins y los
+# recuentos se hacen en la base de datos y solo viajan los resultados. El
+# driver mantiene un pool de conexiones que comparten todas las consultas
+class Neo4jBackend:
+
+    nodes_of_type_query = NODES_OF_TYPE
+    actors_info_query = ACTORS_INFO
+    robot_interactions_query = ROBOT_INTERACTIONS
+    emotion_counts_query = EMOTION_COUNTS
+    actor_summary_query = ACTOR_SUMMARY
+    human_emotional_states_query = HUMAN_EMOTIONAL_STATES
+    performed_interactions_query = PERFORMED_INTERACTIONS
+    emotion_events_query = EMOTION_EVENTS
+
+    def __init__(self, uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD, database=NEO4J_DATABASE,
+                 pool_size=POOL_SIZE):
+        self.uri = uri
+        self.database = database
+        self.driver = GraphDatabase.driver(uri, auth=(user, password), max_connection_pool_size=pool_size)
+
+    def close(self):
+        self.driver.close()
+
+    # Lanza una consulta de solo lectura con sus parámetros y devuelve el resultado como DataFrame
+    def query(self, cypher, **parameters):
+        return self.driver.execute_query(
+            cypher, parameters,
+            routing_=RoutingControl.READ,
+            database_=self.database,
+            result_transformer_=Result.to_df
+        )
+
+    # Nombres de los nodos del tipo indicado (p. ej. 'Robot' o 'Human')
+    def nodes_of_type(self, node_type):
+        return self.query(self.nodes_of_type_query, type=node_type)['id'].tolist()
+
+    # Tipo y nombre de cada actor, con el formato de get_actors_info
+    def actors_info(self, actor_type):
+        result = self.query(self.actors_info_query, type=actor_type).reindex(columns=['actor', 'type', 'name'])
+        result.columns = [actor_type, 'Label Value', 'name']
+        return result
+
+    # Interacciones y estados emocionales de los robots (todos o los de la
+    # lista), con el formato de get_interactions_for_all_robots
+    def interactions_for_all_robots(self, robots=None):
+        result = self.query(self.robot_interactions_query, robots=None if robots is None else list(robots), links=ACTOR_LINKS)
+        result = result.reindex(columns=INTERACTION_COLUMNS)
+        return _parse_date_columns(result, ['DateInteraction', 'DateEmotionalState'])
+
+    def interactions_for_robot(self, robot):
+        return self.interactions_for_all_robots(robots=[robot])
+
+    # Número de apariciones de cada estado emocional, con el formato de count_emotional_states
+    def emotion_counts(self):
+        return self.query(self.emotion_counts_query, links=ACTOR_LINKS).reindex(columns=['EmotionalState', 'Count'])
+
+    # Resumen de cada robot y humano, con el formato de get_actor_summary
+    def actor_summary(self):
+        result = self.query(self.actor_summary_query, links=ACTOR_LINKS)
+        dates = result['dates'].explode()
+        dates = pd.Series(parse_dates(dates).to_numpy(), index=dates.index).groupby(level=0)
+        summary = pd.DataFrame({
+            'Performed': result['Performed'].to_numpy(dtype='int64'),
+            'Received': result['Received'].to_numpy(dtype='int64'),
+            'EmotionalStates': result['states'].map(lambda states: len(set(states))).to_numpy(dtype='int64'),
+            'FirstDate': dates.min().to_numpy(),
+            'LastDate': dates.max().to_numpy()
+        }, index=pd.Index(result['Actor'].to_numpy(), dtype=object), columns=ACTOR_SUMMARY_COLUMNS)
+        return summary
+
+    # Estados emocionales de los humanos, con el formato de get_human_emotional_states.
+    # MERGE funde los estados directos repetidos, así que uno directo repite
+    # un evento causado en cuanto hay un estado causado igual para el humano
+    def human_emotional_states(self, humans=None):
+        result = self.query(self.human_emotional_states_query, humans=None if humans is None else list(humans), links=ACTOR_LINKS)
+        result = result.reindex(columns=HUMAN_EMOTION_COLUMNS + ['StateNode'])
+        caused = result['StateNode'].notnull()
+        pairs = pd.MultiIndex.from_frame(result[['Human', 'EmotionalState']])
+        result = result[caused | ~pairs.isin(pairs[caused.to_numpy()])]
+        result = result.drop_duplicates().sort_values(['Human', 'StateNode'], kind='stable', na_position='last')
+        result = result.reset_index(drop=True).reindex(columns=HUMAN_EMOTION_COLUMNS)
+        return _parse_date_columns(result, ['DateInteraction', 'DateEmotionalState'])
+
+    # Filas performedBy de las interacciones de un actor, con las columnas del CSV
+    def performed_interactions(self, actor):
+        return self.query(self.performed_interactions_query, actor=actor)
+
+    # Secuencias de estados emocionales, con el formato de get_emotion_sequences.
+    # Neo4j no guarda el orden de las filas del CSV, así que los estados de
+    # igual fecha se desempatan por el nombre del nodo de estado
+    def emotion_sequences(self):
+        events = self.query(self.emotion_events_query, links=ACTOR_LINKS)
+        events = events.reindex(columns=['Actor', 'ActorType', 'Interaction', 'EmotionalState', 'Date', 'StateNode'])
+        events = _parse_date_columns(events.rename(columns={'StateNode': 'Order'}), ['Date'])
+        actors = self.nodes_of_type('Robot') + self.nodes_of_type('Human')
+        return build_emotion_sequences(events, actors=actors)
+
+
+# Neo4jBackend sobre el esquema tipado que escribe typed_statements. Las
+# etiquetas de tipo no se pueden pasar como parámetro, así que las consultas
+# por tipo las incluyen en el texto, escapadas
+class TypedNeo4jBackend(Neo4jBackend):
+
+    robot_interactions_query = TYPED_ROBOT_INTERACTIONS
+    emotion_counts_query = TYPED_EMOTION_COUNTS
+    actor_summary_query = TYPED_ACTOR_SUMMARY
+    human_emotional_states_query = TYPED_HUMAN_EMOTIONAL_STATES
+    performed_interactions_query = TYPED_PERFORMED_INTERACTIONS
+    emotion_events_query = TYPED_EMOTION_EVENTS
+
+    def nodes_of_type(self, node_type):
+        query = f"MATCH (n:{cypher_name(node_type)}) RETURN n.id AS id ORDER BY id"
+        return self.query(query)['id'].tolist()
+
+    def actors_info(self, actor_type):
+        query = f"MATCH (n:{cypher_name(actor_type)}) RETURN n.id AS actor, $type AS type, n.label AS name ORDER BY actor"
+        result = self.query(query, type=actor_type).reindex(columns=['actor', 'type', 'name'])
+        result.columns = [actor_type, 'Label Value', 'name']
+        return result
+
+
+# Consultas del esquema indicado (SCHEMA_GENERIC o SCHEMA_TYPED) con la conexión por defecto
+def open_backend(schema=NEO4J_SCHEMA, **options):
+    if schema == SCHEMA_TYPED:
+        return TypedNeo4jBackend(**options)
+    if schema == SCHEMA_GENERIC:
+        return Neo4jBackend(**options)
+    raise ValueError(f"Unknown Neo4j schema: {schema}")
+
+
+# Nombre de etiqueta, tipo de relación o propiedad escapado para incluirlo en una consulta
+def cypher_name(name):
+    return '`' + str(name).replace('`', '``') + '`'
+
+
+# Sentencias (consulta, filas) que escriben un bloque de tripletas en el
+# esquema tipado, una por etiqueta de tipo, propiedad o tipo de relación
+# presente en el bloque: las tripletas 'type' añaden la etiqueta al nodo, las
+# de literales guardan el valor en la propiedad del mismo nombre que la
+# relación y el resto se convierten en relaciones de ese tipo. Los literales
+# se reconocen con la misma regla que el grafo interactivo (ebb.graph); un
+# literal 'id' se rechaza porque sobrescribiría la clave de los MERGE
+def typed_statements(df):
+    is_type = df['label'] == 'type'
+    literal = (df['label'].isin(LITERAL_LABELS).to_numpy() | literal_values(df['node2'])) & ~is_type
+    if (df.loc[literal, 'label'] == 'id').any():
+        raise ValueError("The 'id' relation cannot hold a literal in the typed Neo4j schema: it is the node key")
+
+    for node_type, rows in df[is_type].groupby('node2', sort=False):
+        query = f"UNWIND $rows AS row MERGE (n:Node {{id: row.node1}}) SET n:{cypher_name(node_type)}"
+        yield query, rows[['node1']].to_dict('records')
+
+    for label, rows in df[literal].groupby('label', sort=False):
+        query = f"UNWIND $rows AS row MERGE (n:Node {{id: row.node1}}) SET n.{cypher_name(label)} = row.node2"
+        yield query, rows[['node1', 'node2']].to_dict('records')
+
+    for label, rows in df[~literal & ~is_type].groupby('label', sort=False):
+        query = (
+            "UNWIND $rows AS row "
+            "MERGE (n1:Node {id: row.node1}) "
+            "MERGE (n2:Node {id: row.node2}) "
+            f"MERGE (n1)-[:{cypher_name(label)}]->(n2)"
+        )
+        yield query, rows[['node1', 'node2']].to_dict('records')
+
+
+# Convierte a datetime las columnas de literales de fecha devueltas por Neo4j
+def _parse_date_columns(frame, columns):
+    for column in columns:
+        frame[column] = parse_dates(frame[column]).to_numpy()
+    return frame
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from .store import TripleStore, check_columns
+
+# Filas por bloque al leer el CSV
+CHUNK_SIZE = 200_000
+
+
+# Lee el CSV de tripletas por bloques sin cargar el fichero entero en memoria.
+# Las columnas se comprueban en el primer bloque, antes de leer el resto, y
+# progress(filas_leidas, fraccion) se llama tras cada bloque; la fracción solo
+# se conoce si se indica total_bytes y la fuente admite tell(). Todos los
+# valores se leen como texto: si se infiriera el tipo de cada bloque, un valor
+# como 7 se internaría como entero en unos bloques y como '7' en otros
+def iter_csv_chunks(source, chunksize=CHUNK_SIZE, progress=None, total_bytes=None):
+    rows = 0
+    with pd.read_csv(source, chunksize=chunksize, dtype=str) as reader:
+        for chunk in reader:
+            if rows == 0:
+                check_columns(chunk)
+            rows += len(chunk)
+            yield chunk
+
+            if progress is not None:
+                fraction = None
+                if total_bytes and hasattr(source, 'tell'):
+                    fraction = min(source.tell() / total_bytes, 1.0)
+                progress(rows, fraction)
+
+
+# Construye el almacén de tripletas a partir del CSV, indexando bloque a bloque
+def load_csv(source, chunksize=CHUNK_SIZE, progress=None, total_bytes=None):
+    return TripleStore().extend(
+        iter_csv_chunks(source, chunksize=chunksize, progress=progress, total_bytes=total_bytes)
+    )
@@ -0,0 +1,153 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .analytics import count_emotional_states, get_actor_summary, get_interactions_for_all_robots
+from .store import TripleStore
+
+# Relaciones que unen una interacción con sus actores
+_ACTOR_LINKS = ('performedBy', 'objectOfAction')
+
+
+# Robots y humanos cuyos resultados pueden cambiar con las filas desde
+# 'first_row': los que aparecen en ellas y los enlazados a las interacciones
+# que aparecen en ellas, directamente o a través del estado emocional que causaron
+def _affected_actors(store, first_row):
+    nodes = pd.unique(np.concatenate([store.codes1[first_row:], store.codes2[first_row:]]))
+    nodes = nodes[nodes >= 0]
+
+    caused = store.positions_in('causedBy', node1=nodes)
+    interactions = np.concatenate([nodes, store.codes2[caused]])
+    links = np.concatenate([store.positions_in(label, node1=interactions) for label in _ACTOR_LINKS])
+    candidates = pd.unique(np.concatenate([nodes, store.codes2[links]]))
+
+    types = store.positions_in('type', node1=candidates)
+    affected = []
+    for actor_type in ('Robot', 'Human'):
+        code = store.encode(actor_type)
+        actors = types[store.codes2[types] == code] if code >= 0 else types[:0]
+        affected.append(store.decode(pd.unique(store.codes1[actors])))
+    return affected
+
+
+# Interacciones y recuento de estados emocionales de cada robot, en diccionarios
+# nuevos: los de 'interactions' y 'emotions' con las filas de 'robots' sustituidas
+def _group_robots(interactions, emotions, rows, robots):
+    interactions, emotions = dict(interactions), dict(emotions)
+    groups = dict(iter(rows.groupby('Robot', sort=False)))
+    for robot in robots:
+        robot_rows = groups.get(robot)
+        if robot_rows is None:
+            interactions.pop(robot, None)
+            emotions.pop(robot, None)
+            continue
+        interactions[robot] = robot_rows
+        emotions[robot] = robot_rows['EmotionalState'].dropna().value_counts(sort=False)
+    return interactions, emotions
+
+
+# Resultados de un conjunto en vivo en una versión concreta. Se construye
+# completo antes de publicarse y no se modifica después, así que quien lo lee
+# ve siempre un almacén, un resumen y unas interacciones coherentes entre sí
+class _LiveState:
+
+    def __init__(self, store, summary, interactions, emotions, version):
+        self.store = store
+        self.summary = summary
+        self.version = version
+        self.robot_interactions = interactions
+        self.robot_emotions = emotions
+
+        # Interacciones y estados emocionales de todos los robots, con el formato
+        # de get_interactions_for_all_robots
+        frames = [interactions[robot] for robot in store.nodes_of_type('Robot') if robot in interactions]
+        if frames:
+            self.interactions = pd.concat(frames, ignore_index=True)
+        else:
+            self.interactions = get_interactions_for_all_robots(store, robots=[])
+
+        # Número de apariciones de cada estado emocional entre las interacciones
+        # de todos los robots, con el formato de count_emotional_states
+        counts = [count for count in emotions.values() if len(count) > 0]
+        if counts:
+            total = pd.concat(counts).groupby(level=0, sort=False).sum().sort_values(ascending=False, kind='stable')
+            emotional_count = total.reset_index()
+            emotional_count.columns = ['EmotionalState', 'Count']
+        else:
+            emotional_count = count_emotional_states(self.interactions.iloc[:0])
+        self.emotion_counts = emotional_count
+
+
+# Conjunto de datos que sigue recibiendo tripletas mientras la caja negra graba.
+# Mantiene el resumen por actor, las interacciones de cada robot y el recuento
+# de estados emocionales; al añadir filas solo se recalculan los robots y
+# humanos a los que afectan. Como se recalculan con todas las filas ya
+# recibidas, da igual que el causedBy de una interacción llegue antes o después
+# que la propia interacción
+class LiveDataset:
+
+    def __init__(self, store=None):
+        store = TripleStore() if store is None else store
+        self._lock = threading.Lock()
+        interactions, emotions = _group_robots(
+            {}, {}, get_interactions_for_all_robots(store), store.nodes_of_type('Robot')
+        )
+        self._state = _LiveState(store, get_actor_summary(store), interactions, emotions, 0)
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def nbytes(self):
+        return self.store.nbytes
+
+    @property
+    def store(self):
+        return self._state.store
+
+    @property
+    def summary(self):
+        return self._state.summary
+
+    @property
+    def version(self):
+        return self._state.version
+
+    @property
+    def interactions(self):
+        return self._state.interactions
+
+    @property
+    def emotion_counts(self):
+        return self._state.emotion_counts
+
+    # Añade un bloque de tripletas (node1, label, node2) y actualiza los
+    # resultados de los actores afectados. Devuelve sus nombres. Otras sesiones
+    # leen el conjunto mientras tanto, así que las filas se añaden a una copia
+    # del almacén y los resultados se calculan en objetos nuevos; todo se
+    # publica a la vez al sustituir el estado
+    def append(self, rows):
+        with self._lock:
+            state = self._state
+            store = state.store.copy()
+            first_row = len(store)
+            store.append(rows)
+            robots, humans = _affected_actors(store, first_row)
+            actors = np.concatenate([robots, humans])
+
+            summary = get_actor_summary(store, actors=actors)
+            known = summary.index.isin(state.summary.index)
+            updated = state.summary.copy()
+            updated.loc[summary.index[known]] = summary[known]
+            if not known.all():
+                updated = pd.concat([updated, summary[~known]])
+                # concat infiere un índice de texto; el resumen se indexa con object, como el del almacén
+                updated.index = pd.Index(updated.index, dtype=object)
+
+            interactions, emotions = _group_robots(
+                state.robot_interactions, state.robot_emotions,
+                get_interactions_for_all_robots(store, robots=robots), robots
+            )
+            self._state = _LiveState(store, updated, interactions, emotions, state.version + 1)
+            return actors
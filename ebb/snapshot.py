@@ -0,0 +1,247 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from .ingest import CHUNK_SIZE, iter_csv_chunks
+from .store import TripleStore, index_keys, intern_chunk
+
+# Ficheros Arrow IPC de una instantánea: los códigos de cada fila, el
+# vocabulario con sus fechas y los dos índices. Cada lote (record batch) de un
+# índice es un tramo de claves ordenadas
+ROWS_FILE = 'rows.arrow'
+VOCABULARY_FILE = 'vocabulary.arrow'
+SUBJECT_INDEX_FILE = 'subject_index.arrow'
+OBJECT_INDEX_FILE = 'object_index.arrow'
+
+ROW_ARRAYS = ('codes1', 'codes_label', 'codes2')
+VOCABULARY_ARRAYS = ('vocabulary', 'literal_dates', 'literal_parsed', 'node_dates')
+
+# Filas por tramo de los índices al convertir un CSV directamente a disco;
+# cada tramo se ordena en memoria (unos 24 bytes por fila y por índice)
+RUN_ROWS = 20_000_000
+
+# Clave de los metadatos de la instantánea en el esquema de rows.arrow
+_METADATA = b'ebb.snapshot'
+
+_INDEX_SCHEMA = pa.schema([('keys', pa.int64()), ('positions', pa.int64())])
+
+
+def _write_table(path, arrays, metadata=None):
+    table = pa.table({name: pa.array(values) for name, values in arrays.items()})
+    if metadata is not None:
+        table = table.replace_schema_metadata({_METADATA: json.dumps(metadata)})
+    # Sin compresión, para poder leer las columnas directamente del mapa de memoria
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_table(path):
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _metadata(key, name, rows):
+    return {'key': key, 'name': name, 'rows': rows, 'created': time.time()}
+
+
+# El vocabulario se guarda como texto; no debe haber dos valores con el mismo texto
+def _vocabulary_strings(vocabulary):
+    strings = np.asarray(vocabulary, dtype=object).astype(str)
+    if len(set(strings.tolist())) != len(strings):
+        raise ValueError("El vocabulario contiene valores que no se distinguen como texto")
+    return strings
+
+
+def _write_run(writer, keys, positions):
+    writer.write_batch(pa.record_batch([pa.array(keys), pa.array(positions)], schema=_INDEX_SCHEMA))
+
+
+def _write_index(path, runs):
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, _INDEX_SCHEMA) as writer:
+        for keys, positions in runs:
+            _write_run(writer, keys, positions)
+
+
+def _read_index(path):
+    table = _read_table(path)
+    return [
+        (keys.to_numpy(), positions.to_numpy())
+        for keys, positions in zip(table['keys'].chunks, table['positions'].chunks)
+    ]
+
+
+def _write_vocabulary(path, arrays):
+    columns = {column: arrays[column] for column in VOCABULARY_ARRAYS}
+    columns['vocabulary'] = _vocabulary_strings(columns['vocabulary'])
+    _write_table(os.path.join(path, VOCABULARY_FILE), columns)
+
+
+# Las instantáneas publicadas no se vuelven a escribir, porque otras sesiones
+# pueden tenerlas mapeadas en memoria: cada una se escribe en un directorio
+# temporal oculto junto a las demás y después se renombra de una vez
+def _staging_directory(directory, key):
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f'.{key}.', dir=directory)
+
+
+# Publica como 'path' la instantánea escrita en 'staging'. Si otra sesión ya
+# publicó la misma, se descarta esta copia; un directorio sin rows.arrow es el
+# resto de una escritura interrumpida y se sustituye
+def _publish(staging, path):
+    if not os.path.exists(os.path.join(path, ROWS_FILE)):
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rename(staging, path)
+            return
+        except OSError:
+            pass
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+# Guarda el almacén como instantánea en formato Arrow IPC dentro de 'directory'.
+# 'key' es la huella del CSV original, que identifica a la instantánea, y 'name'
+# el nombre con el que aparece en la biblioteca. Si ya existe no se escribe
+# de nuevo. Devuelve su ruta
+def save_snapshot(store, directory, key, name):
+    path = os.path.join(directory, key)
+    if os.path.exists(os.path.join(path, ROWS_FILE)):
+        return path
+    arrays = store.to_arrays()
+    staging = _staging_directory(directory, key)
+    try:
+        _write_vocabulary(staging, arrays)
+        _write_index(os.path.join(staging, SUBJECT_INDEX_FILE), arrays['subject_index'])
+        _write_index(os.path.join(staging, OBJECT_INDEX_FILE), arrays['object_index'])
+        # rows.arrow se escribe al final: su presencia marca la instantánea como completa
+        _write_table(os.path.join(staging, ROWS_FILE), {column: arrays[column] for column in ROW_ARRAYS},
+                     _metadata(key, name, len(store)))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _publish(staging, path)
+    return path
+
+
+# Convierte un CSV de tripletas en una instantánea sin cargarlo entero en
+# memoria, para ficheros mayores que la RAM. Los códigos de cada bloque van a
+# disco según se leen y los índices se escriben como tramos ordenados de
+# run_rows filas, que no hace falta mezclar: una consulta busca en cada tramo.
+# En memoria solo quedan el vocabulario y el tramo en curso. Como
+# save_snapshot, no reescribe una instantánea que ya existe
+def convert_csv(source, directory, key, name, chunksize=CHUNK_SIZE, run_rows=RUN_ROWS,
+                progress=None, total_bytes=None):
+    path = os.path.join(directory, key)
+    if os.path.exists(os.path.join(path, ROWS_FILE)):
+        return path
+    staging = _staging_directory(directory, key)
+    try:
+        _convert_csv(source, staging, key, name, chunksize, run_rows, progress, total_bytes)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _publish(staging, path)
+    return path
+
+
+def _convert_csv(source, path, key, name, chunksize, run_rows, progress, total_bytes):
+    raw_paths = [os.path.join(path, f'{column}.tmp') for column in ROW_ARRAYS]
+
+    vocabulary = {}
+    rows = 0
+    pending = []
+
+    with pa.OSFile(os.path.join(path, SUBJECT_INDEX_FILE), 'wb') as subject_sink, \
+            pa.OSFile(os.path.join(path, OBJECT_INDEX_FILE), 'wb') as object_sink, \
+            pa.ipc.new_file(subject_sink, _INDEX_SCHEMA) as subject_writer, \
+            pa.ipc.new_file(object_sink, _INDEX_SCHEMA) as object_writer:
+
+        # Ordena el tramo en curso y lo escribe como un lote de cada índice
+        def flush():
+            if not pending:
+                return
+            subject_keys, object_keys, positions = (np.concatenate(part) for part in zip(*pending))
+            for writer, keys in ((subject_writer, subject_keys), (object_writer, object_keys)):
+                order = np.argsort(keys, kind='stable')
+                _write_run(writer, keys[order], positions[order])
+            pending.clear()
+
+        raw_files = [open(raw_path, 'wb') for raw_path in raw_paths]
+        try:
+            for chunk in iter_csv_chunks(source, chunksize=chunksize, progress=progress, total_bytes=total_bytes):
+                if chunk.empty:
+                    continue
+                codes = intern_chunk(vocabulary, chunk)
+                for raw_file, column_codes in zip(raw_files, codes):
+                    raw_file.write(column_codes.tobytes())
+                pending.append((*index_keys(codes), np.arange(rows, rows + len(chunk))))
+                rows += len(chunk)
+                if sum(len(part[0]) for part in pending) >= run_rows:
+                    flush()
+            flush()
+        finally:
+            for raw_file in raw_files:
+                raw_file.close()
+
+    # Columnas de códigos: de los ficheros temporales a rows.arrow sin pasar por memoria
+    codes = [
+        np.memmap(raw_path, dtype=np.int32, mode='r') if rows else np.empty(0, dtype=np.int32)
+        for raw_path in raw_paths
+    ]
+    rows_tmp = os.path.join(path, ROWS_FILE + '.tmp')
+    _write_table(rows_tmp, dict(zip(ROW_ARRAYS, codes)), _metadata(key, name, rows))
+    del codes
+    for raw_path in raw_paths:
+        os.remove(raw_path)
+
+    # Las fechas se convierten con el almacén ya en disco
+    rows_table = _read_table(rows_tmp)
+    arrays = {column: rows_table[column].to_numpy() for column in ROW_ARRAYS}
+    arrays['vocabulary'] = np.array(list(vocabulary), dtype=object)
+    arrays['subject_index'] = _read_index(os.path.join(path, SUBJECT_INDEX_FILE))
+    arrays['object_index'] = _read_index(os.path.join(path, OBJECT_INDEX_FILE))
+    _write_vocabulary(path, TripleStore.from_arrays(arrays).to_arrays())
+
+    os.replace(rows_tmp, os.path.join(path, ROWS_FILE))
+
+
+# Abre una instantánea con mapeo de memoria. Los códigos y los índices son
+# vistas de solo lectura sobre los ficheros, que el sistema carga por páginas
+# según las consultan; solo el vocabulario se carga en memoria
+def open_snapshot(path):
+    rows = _read_table(os.path.join(path, ROWS_FILE))
+    values = _read_table(os.path.join(path, VOCABULARY_FILE))
+
+    arrays = {column: rows[column].to_numpy() for column in ROW_ARRAYS}
+    arrays.update({column: values[column].to_numpy() for column in VOCABULARY_ARRAYS if column != 'vocabulary'})
+    arrays['vocabulary'] = np.array(values['vocabulary'].to_pylist(), dtype=object)
+    arrays['subject_index'] = _read_index(os.path.join(path, SUBJECT_INDEX_FILE))
+    arrays['object_index'] = _read_index(os.path.join(path, OBJECT_INDEX_FILE))
+    return TripleStore.from_arrays(arrays)
+
+
+# Metadatos (key, name, rows, created) de una instantánea, leyendo solo el esquema
+def snapshot_info(path):
+    with pa.memory_map(os.path.join(path, ROWS_FILE), 'r') as source:
+        schema = pa.ipc.open_file(source).schema
+    info = json.loads(schema.metadata[_METADATA])
+    info['path'] = path
+    return info
+
+
+# Instantáneas completas de 'directory', de la más reciente a la más antigua
+def list_snapshots(directory):
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for entry in os.scandir(directory):
+        if entry.is_dir() and not entry.name.startswith('.') and os.path.exists(os.path.join(entry.path, ROWS_FILE)):
+            try:
+                snapshots.append(snapshot_info(entry.path))
+            except (OSError, ValueError, KeyError):
+                continue
+    return sorted(snapshots, key=lambda info: info['created'], reverse=True)
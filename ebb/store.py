@@ -0,0 +1,378 @@
+import copy
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from .dates import parse_dates
+
+# Columnas obligatorias de un volcado de la Ethical Black Box
+COLUMNS = ('node1', 'label', 'node2')
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+# Resolución de las fechas ya convertidas
+DATE_DTYPE = 'datetime64[us]'
+
+
+# Comprueba que un bloque de tripletas tiene las columnas node1, label y node2
+def check_columns(data):
+    missing = [column for column in COLUMNS if column not in data.columns]
+    if missing:
+        raise ValueError(f"El archivo CSV no contiene las columnas necesarias: {', '.join(missing)}")
+
+
+# Clave entera única para un par de códigos (p. ej. node1 y label); el -1 de
+# los valores vacíos se desplaza para que las claves de 'first' sean contiguas
+def _pair(first, second):
+    return (np.asarray(first, dtype=np.int64) << 32) + np.asarray(second, dtype=np.int64) + 1
+
+
+# Índice sobre una clave entera: tramos de claves ordenadas con sus posiciones
+# de fila. Una consulta son dos búsquedas binarias por tramo; dentro de cada
+# clave las posiciones quedan en orden de aparición. En memoria hay un solo
+# tramo y la consulta devuelve una vista, sin copias. Los índices leídos de
+# disco ('mapped') conservan los tramos que se ordenaron por separado al
+# convertir el CSV, que no se modifican; lo que se les añade se mezcla en un
+# último tramo en memoria
+class _SortedIndex:
+
+    def __init__(self, runs=None, mapped=False):
+        if not runs:
+            runs = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp))]
+        self.runs = list(runs)
+        self.frozen = len(self.runs) if mapped else 0
+
+    @property
+    def nbytes(self):
+        return sum(keys.nbytes + positions.nbytes for keys, positions in self.runs)
+
+    # Índice con los mismos tramos: extend sustituye el último tramo en la
+    # lista de la copia sin modificar sus arrays, así que el original no cambia
+    def copy(self):
+        index = copy.copy(self)
+        index.runs = list(self.runs)
+        return index
+
+    # Añade las claves de un bloque cuyas filas empiezan en 'offset'. Solo se
+    # ordena el bloque, que se inserta en el último tramo detrás de las claves
+    # iguales: el coste es lineal en el tamaño del tramo, sin reordenarlo
+    def extend(self, keys, offset):
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        positions = np.arange(offset, offset + len(keys))[order]
+        if len(self.runs) == self.frozen:
+            self.runs.append((keys, positions))
+            return
+        run_keys, run_positions = self.runs[-1]
+        at = np.searchsorted(run_keys, keys, side='right')
+        self.runs[-1] = (np.insert(run_keys, at, keys), np.insert(run_positions, at, positions))
+
+    # Posiciones con clave en [low, high); por defecto solo la clave 'low'
+    def lookup(self, low, high=None):
+        high = low + 1 if high is None else high
+        found = []
+        for keys, positions in self.runs:
+            start, end = np.searchsorted(keys, [low, high])
+            found.append(positions[start:end])
+        return found[0] if len(found) == 1 else np.concatenate(found)
+
+    # Posiciones de varias claves a la vez, sin un bucle de Python por clave.
+    # Las claves se ordenan para que las búsquedas recorran el tramo en orden
+    def lookup_many(self, keys):
+        keys = np.sort(keys)
+        found = []
+        for run_keys, positions in self.runs:
+            start = np.searchsorted(run_keys, keys, side='left')
+            counts = np.searchsorted(run_keys, keys, side='right') - start
+            offsets = np.cumsum(counts) - counts
+            found.append(positions[np.repeat(start - offsets, counts) + np.arange(counts.sum())])
+        return np.concatenate(found)
+
+
+# Interna los valores de un bloque de tripletas en el vocabulario (valor ->
+# código, que crece con los valores nuevos) y devuelve sus códigos por columna
+def intern_chunk(vocabulary, chunk):
+    values = np.concatenate([chunk[column].to_numpy(dtype=object) for column in COLUMNS])
+    local_codes, uniques = pd.factorize(values)
+    mapping = np.fromiter(
+        (vocabulary.setdefault(value, len(vocabulary)) for value in uniques),
+        dtype=np.int32, count=len(uniques)
+    )
+    codes = np.append(mapping, np.int32(-1))[local_codes]
+    return codes.reshape(len(COLUMNS), len(chunk))
+
+
+# Claves de los dos índices para los códigos de un bloque: (node1, label) y (label, node2)
+def index_keys(codes):
+    codes1, codes_label, codes2 = codes
+    return _pair(codes1, codes_label), _pair(codes_label, codes2)
+
+
+# Almacén de tripletas en memoria con índices ordenados sobre el CSV subido,
+# consultados con búsquedas binarias (ver _SortedIndex). Se construye una sola
+# vez por fichero y sustituye a los filtros
+# data[(data['node1'] == x) & (data['label'] == y)], que recorren la tabla
+# completa en cada consulta.
+#
+# Los valores de las tres columnas se internan en un vocabulario común, así que
+# cada tripleta se guarda como tres códigos enteros y todas las comparaciones
+# son entre enteros. self.data expone la tabla como columnas categóricas que
+# comparten ese vocabulario.
+class TripleStore:
+
+    def __init__(self, data=None):
+        # Vocabulario compartido: valor -> código, en orden de aparición
+        self._vocabulary = {}
+        self.vocabulary = np.empty(0, dtype=object)
+        self._decoder = np.array([None], dtype=object)
+
+        self.codes1 = np.empty(0, dtype=np.int32)
+        self.codes_label = np.empty(0, dtype=np.int32)
+        self.codes2 = np.empty(0, dtype=np.int32)
+
+        # Índices: (node1, label) y (label, node2) -> posiciones de fila.
+        # Las filas de una misma label son un tramo contiguo del segundo
+        self._by_subject = _SortedIndex()
+        self._by_object = _SortedIndex()
+
+        # Fechas convertidas: por código de literal (cada literal se analiza una
+        # sola vez) y por código de nodo según su primera tripleta 'date'.
+        # El último elemento es el NaT de los códigos -1
+        self._literal_dates = np.empty(0, dtype=DATE_DTYPE)
+        self._literal_parsed = np.empty(0, dtype=bool)
+        self._node_dates = np.array(['NaT'], dtype=DATE_DTYPE)
+
+        self.extend([] if data is None else [data])
+
+    # Añade bloques de tripletas (p. ej. los chunks de pd.read_csv) internando
+    # e indexando cada uno según llega; del CSV solo se conservan los códigos
+    def extend(self, chunks):
+        first_row = offset = len(self)
+        parts = ([self.codes1], [self.codes_label], [self.codes2])
+        for chunk in chunks:
+            check_columns(chunk)
+            if chunk.empty:
+                continue
+            codes = self._intern(chunk)
+            self._index_chunk(codes, offset)
+            for part, column_codes in zip(parts, codes):
+                part.append(column_codes)
+            offset += len(chunk)
+
+        self._set_table([np.concatenate(part) for part in parts])
+        self._index_dates(first_row)
+        return self
+
+    def append(self, rows):
+        return self.extend([rows])
+
+    # Arrays que definen el almacén ya construido: vocabulario, códigos, tramos
+    # de los índices y fechas convertidas. Con from_arrays se reconstruye sin
+    # volver a internar ni indexar (p. ej. desde una instantánea en disco); si
+    # faltan las fechas, se convierten al reconstruirlo
+    def to_arrays(self):
+        return {
+            'vocabulary': self.vocabulary,
+            'codes1': self.codes1,
+            'codes_label': self.codes_label,
+            'codes2': self.codes2,
+            'subject_index': self._by_subject.runs,
+            'object_index': self._by_object.runs,
+            'literal_dates': self._literal_dates,
+            'literal_parsed': self._literal_parsed,
+            'node_dates': self._node_dates[:-1]
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        store = cls()
+        store._vocabulary = dict(zip(arrays['vocabulary'].tolist(), range(len(arrays['vocabulary']))))
+        store._by_subject = _SortedIndex(arrays['subject_index'], mapped=True)
+        store._by_object = _SortedIndex(arrays['object_index'], mapped=True)
+        store._set_table([arrays['codes1'], arrays['codes_label'], arrays['codes2']])
+        if 'node_dates' in arrays:
+            store._literal_dates = arrays['literal_dates']
+            store._literal_parsed = arrays['literal_parsed']
+            store._node_dates = np.append(arrays['node_dates'], np.datetime64('NaT')).astype(DATE_DTYPE)
+        else:
+            store._index_dates()
+        return store
+
+    # Copia que comparte los arrays del almacén, que nunca se modifican en su
+    # sitio: las filas que se añadan a la copia no alteran el original. Solo se
+    # copian el vocabulario y las listas de tramos de los índices, y los
+    # índices conservan sus tramos sin congelarlos, así que copiar antes de
+    # cada bloque añadido no acumula tramos
+    def copy(self):
+        store = copy.copy(self)
+        store._vocabulary = dict(self._vocabulary)
+        store._by_subject = self._by_subject.copy()
+        store._by_object = self._by_object.copy()
+        return store
+
+    def _set_table(self, codes):
+        new_values = list(islice(self._vocabulary, len(self.vocabulary), None))
+        self.vocabulary = np.append(self.vocabulary, np.array(new_values, dtype=object))
+        # El código -1 (valor vacío) se decodifica como None
+        self._decoder = np.append(self.vocabulary, None)
+        self.codes1, self.codes_label, self.codes2 = codes
+        self._data = None
+
+    # Tabla node1/label/node2 con columnas categóricas de vocabulario compartido.
+    # Se construye al consultarla por primera vez, no en cada bloque añadido;
+    # los códigos pasan a ser vistas de esas columnas, sin copias
+    @property
+    def data(self):
+        if self._data is None:
+            dtype = pd.CategoricalDtype(pd.Index(self.vocabulary, dtype=object))
+            self._data = pd.DataFrame({
+                column: pd.Categorical.from_codes(column_codes, dtype=dtype, validate=False)
+                for column, column_codes in zip(COLUMNS, (self.codes1, self.codes_label, self.codes2))
+            })
+            self.codes1, self.codes_label, self.codes2 = (
+                self._data[column].cat.codes.to_numpy() for column in COLUMNS
+            )
+        return self._data
+
+    def _intern(self, chunk):
+        return intern_chunk(self._vocabulary, chunk)
+
+    def _index_chunk(self, codes, offset):
+        subject_keys, object_keys = index_keys(codes)
+        self._by_subject.extend(subject_keys, offset)
+        self._by_object.extend(object_keys, offset)
+
+    # Convierte los literales de fecha nuevos y asigna a cada nodo la fecha de
+    # su primera tripleta 'date'. Solo se recorren las filas desde 'first_row';
+    # al añadir filas, un nodo que ya tenía una tripleta 'date' no cambia
+    def _index_dates(self, first_row=0):
+        date = self.encode('date')
+        positions = _EMPTY if date < 0 else self._by_object.lookup(_pair(date, -1), _pair(date + 1, -1))
+        positions = np.sort(positions[positions >= first_row])
+        rows = pd.DataFrame({'node': self.codes1[positions], 'value': self.codes2[positions]})
+        rows = rows[(rows['node'] >= 0) & (rows['value'] >= 0)].drop_duplicates('node')
+
+        known_nodes = len(self._node_dates) - 1
+        known = rows['node'].to_numpy()
+        known = known[known < known_nodes]
+        if len(known) > 0:
+            # Los nodos sin fecha pudieron tener antes un literal que no era una fecha
+            undated = known[np.isnat(self._node_dates[known])]
+            earlier = self._by_subject.lookup_many(_pair(undated, date))
+            dated = np.concatenate([known[~np.isnat(self._node_dates[known])], self.codes1[earlier[earlier < first_row]]])
+            rows = rows[~rows['node'].isin(dated)]
+
+        new_codes = len(self.vocabulary) - len(self._literal_dates)
+        self._literal_dates = np.append(self._literal_dates, np.full(new_codes, np.datetime64('NaT'), dtype=DATE_DTYPE))
+        self._literal_parsed = np.append(self._literal_parsed, np.zeros(new_codes, dtype=bool))
+        values = pd.unique(rows['value'])
+        values = values[~self._literal_parsed[values]]
+        self._literal_dates[values] = parse_dates(self.vocabulary[values]).to_numpy(dtype=DATE_DTYPE)
+        self._literal_parsed[values] = True
+
+        # Array nuevo en lugar de modificarlo: otro almacén puede compartir el anterior
+        node_dates = np.full(len(self.vocabulary) + 1, np.datetime64('NaT'), dtype=DATE_DTYPE)
+        node_dates[:known_nodes] = self._node_dates[:known_nodes]
+        node_dates[rows['node'].to_numpy()] = self._literal_dates[rows['value'].to_numpy()]
+        self._node_dates = node_dates
+
+    def __len__(self):
+        return len(self.codes1)
+
+    # Almacén abierto desde una instantánea: sus códigos e índices están
+    # mapeados desde el disco, y añadirle filas los copiaría enteros a memoria
+    @property
+    def mapped(self):
+        return self._by_subject.frozen > 0
+
+    # Memoria aproximada del almacén: códigos, vocabulario y posiciones de los índices
+    @property
+    def nbytes(self):
+        total = self.codes1.nbytes + self.codes_label.nbytes + self.codes2.nbytes
+        total += int(pd.Index(self.vocabulary, dtype=object).memory_usage(deep=True))
+        total += self._by_subject.nbytes + self._by_object.nbytes
+        total += self._literal_dates.nbytes + self._node_dates.nbytes
+        return total
+
+    # Código entero de un valor, o -1 si no aparece en el CSV
+    def encode(self, value):
+        return self._vocabulary.get(value, -1)
+
+    # Valores originales de un array de códigos
+    def decode(self, codes):
+        return self._decoder[codes]
+
+    # Fecha (datetime64) de cada nodo de un array de códigos; NaT si no tiene
+    def node_dates(self, codes):
+        return self._node_dates[codes]
+
+    # Códigos de una de las columnas node1, label o node2
+    def column_codes(self, column):
+        return {'node1': self.codes1, 'label': self.codes_label, 'node2': self.codes2}[column]
+
+    @property
+    def node1(self):
+        return self.decode(self.codes1)
+
+    @property
+    def node2(self):
+        return self.decode(self.codes2)
+
+    # Posiciones de las filas que cumplen el patrón; None actúa como comodín
+    def positions(self, node1=None, label=None, node2=None):
+        codes = [None if value is None else self.encode(value) for value in (node1, label, node2)]
+        if -1 in codes:
+            return _EMPTY
+        code1, code_label, code2 = codes
+
+        if code_label is not None:
+            if code1 is not None:
+                positions = self._by_subject.lookup(_pair(code1, code_label))
+                if code2 is not None:
+                    positions = positions[self.codes2[positions] == code2]
+                return positions
+            if code2 is not None:
+                return self._by_object.lookup(_pair(code_label, code2))
+            return np.sort(self._by_object.lookup(_pair(code_label, -1), _pair(code_label + 1, -1)))
+
+        # Sin label no hay índice aplicable: recorrido completo sobre los códigos
+        mask = np.ones(len(self), dtype=bool)
+        if code1 is not None:
+            mask &= self.codes1 == code1
+        if code2 is not None:
+            mask &= self.codes2 == code2
+        return np.flatnonzero(mask)
+
+    # Posiciones de las filas de una label cuyo node1 (o node2) está entre los
+    # códigos indicados, en orden de fila; una sola consulta vectorizada al índice
+    def positions_in(self, label, node1=None, node2=None):
+        code_label = self.encode(label)
+        if code_label < 0:
+            return _EMPTY
+        if node1 is not None:
+            positions = self._by_subject.lookup_many(_pair(pd.unique(node1), code_label))
+        else:
+            positions = self._by_object.lookup_many(_pair(code_label, pd.unique(node2)))
+        return np.sort(positions)
+
+    # Filas (node1, label, node2) que cumplen el patrón
+    def match(self, node1=None, label=None, node2=None):
+        return self.data.iloc[self.positions(node1, label, node2)]
+
+    # Valores de node2 para un sujeto y una relación
+    def objects(self, node1, label):
+        return self.decode(self.codes2[self.positions(node1=node1, label=label)])
+
+    # Valores de node1 (sin repetir, en orden de aparición) para una relación y un objeto
+    def subjects(self, label, node2):
+        return self.decode(pd.unique(self.codes1[self.positions(label=label, node2=node2)]))
+
+    # Primer valor de node2 para un sujeto y una relación, o None si no existe
+    def first_object(self, node1, label):
+        values = self.objects(node1, label)
+        return values[0] if len(values) > 0 else None
+
+    # Nodos declarados con el tipo indicado ('Robot', 'Human', 'Action'...)
+    def nodes_of_type(self, node_type):
+        return self.subjects('type', node_type)
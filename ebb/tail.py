@@ -0,0 +1,124 @@
+import io
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .ingest import CHUNK_SIZE
+from .live import LiveDataset
+from .store import TripleStore, check_columns
+
+
+# Lector de las filas nuevas de un CSV que crece o de un directorio de
+# segmentos CSV (se leen por orden de nombre). Recuerda hasta qué byte ha
+# leído cada fichero y en cada lectura solo analiza lo escrito desde entonces;
+# una línea a medio escribir se deja para la siguiente lectura. La posición de
+# un fichero solo avanza con commit(), una vez guardadas sus filas
+class CsvTail:
+
+    def __init__(self, path):
+        self.path = path
+        self._offsets = {}
+        self._headers = {}
+
+    def files(self):
+        if not os.path.isdir(self.path):
+            return [self.path]
+        return sorted(
+            entry.path for entry in os.scandir(self.path)
+            if entry.is_file() and entry.name.endswith('.csv')
+        )
+
+    # Bloques de tripletas con las líneas completas de 'path' escritas desde la
+    # última lectura confirmada, junto con la posición (byte final, cabecera)
+    # que se pasa a commit(). None si no hay líneas nuevas. Un fichero que se ha
+    # truncado (p. ej. al rotarlo) se lee desde el principio. Si la cabecera no
+    # tiene las columnas necesarias lanza ValueError y el fichero se vuelve a
+    # comprobar en la siguiente lectura
+    def read_file(self, path, chunksize=CHUNK_SIZE):
+        size = os.path.getsize(path)
+        offset = self._offsets.get(path, 0)
+        header = self._headers.get(path)
+        if size < offset:
+            offset, header = 0, None
+        if size == offset:
+            return None
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            content = f.read(size - offset)
+        end = content.rfind(b'\n') + 1
+        if end == 0:
+            return None
+        content = content[:end]
+
+        if header is None:
+            header, _, content = content.partition(b'\n')
+            header += b'\n'
+            check_columns(pd.read_csv(io.BytesIO(header), nrows=0))
+        chunks = []
+        if content.strip():
+            with pd.read_csv(io.BytesIO(header + content), chunksize=chunksize, dtype=str) as reader:
+                chunks = list(reader)
+        return chunks, (offset + end, header)
+
+    # Confirma que las filas devueltas por read_file ya se han guardado
+    def commit(self, path, position):
+        self._offsets[path], self._headers[path] = position
+
+
+# Conjunto de datos en vivo alimentado por un CsvTail: al crearse lee lo que
+# ya hay escrito y cada poll() añade solo las filas nuevas. Lo comparten todas
+# las sesiones que siguen la misma ruta. Un segmento que no se puede leer no
+# impide añadir los demás: su error queda en 'errors' y se reintenta en cada poll()
+class LiveTail:
+
+    def __init__(self, path, chunksize=CHUNK_SIZE):
+        self.path = path
+        self.chunksize = chunksize
+        self._tail = CsvTail(path)
+        self._lock = threading.Lock()
+
+        store, errors = TripleStore(), {}
+        for file_path, chunks, position in self._read(errors):
+            store.extend(chunks)
+            self._tail.commit(file_path, position)
+        # Un único CSV que no se puede leer no tiene nada que seguir
+        if not os.path.isdir(path) and errors:
+            raise ValueError(errors[path])
+        self.errors = errors
+        self.dataset = LiveDataset(store)
+        self.updated = time.time()
+
+    # Filas nuevas de cada fichero que se puede leer; los errores de los demás
+    # se anotan en 'errors' (fichero -> mensaje)
+    def _read(self, errors):
+        for path in self._tail.files():
+            try:
+                result = self._tail.read_file(path, self.chunksize)
+            except (OSError, ValueError) as e:
+                errors[path] = str(e)
+                continue
+            if result is not None:
+                yield path, *result
+
+    # Lee las filas escritas desde la última consulta y las añade al conjunto,
+    # fichero a fichero, confirmando la posición de cada uno después de añadir
+    # sus filas; devuelve cuántas había. Si otra sesión ya está leyendo, no
+    # espera a que acabe. Los errores se publican al final, en un diccionario nuevo
+    def poll(self):
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            rows, errors = 0, {}
+            for path, chunks, position in self._read(errors):
+                if chunks:
+                    self.dataset.append(pd.concat(chunks, ignore_index=True))
+                    rows += sum(len(chunk) for chunk in chunks)
+                    self.updated = time.time()
+                self._tail.commit(path, position)
+            self.errors = errors
+            return rows
+        finally:
+            self._lock.release()
@@ -42,6 +42,69 @@ with st.sidebar:
         unsafe_allow_html=True
     )
 
+FLASK_URL = 'http://127.0.0.1:5000'
+
+# Envía el fichero al servidor Flask una sola vez; la ingesta en Neo4j queda
+# encolada allí y aquí solo se guarda el identificador del trabajo
+def enviar_csv(uploaded_file):
+    if st.session_state.get('upload_file_id') == uploaded_file.file_id:
+        return
+    st.session_state['upload_file_id'] = uploaded_file.file_id
+    st.session_state['upload_job'] = None
+
+    try:
+        response = requests.post(
+            f'{FLASK_URL}/upload_csv',
+            files={'file': uploaded_file.getvalue()},
+            timeout=60
+        )
+    except requests.RequestException as e:
+        st.session_state['upload_error'] = str(e)
+        return
+
+    if response.status_code == 202:
+        st.session_state['upload_job'] = response.json()['job_id']
+        st.session_state['upload_error'] = None
+    else:
+        st.session_state['upload_error'] = response.json().get('error', 'Unknown error')
+
+# Estado de la carga en Neo4j; el fragmento se refresca solo, sin bloquear el
+# resto de la página, hasta que el trabajo termina
+@st.fragment(run_every=2)
+def estado_carga_neo4j():
+    if st.session_state.get('upload_error'):
+        st.error(f"Failed to send data to Neo4j: {st.session_state['upload_error']}")
+        return
+
+    job_id = st.session_state.get('upload_job')
+    if job_id is None:
+        return
+
+    status = st.session_state.get('upload_status')
+    if status is None or status['job_id'] != job_id or status['status'] in ('queued', 'running'):
+        try:
+            response = requests.get(f'{FLASK_URL}/upload_status/{job_id}', timeout=5)
+            status = response.json()
+        except requests.RequestException:
+            st.info("Waiting for the Neo4j upload status...")
+            return
+        # Un 404 indica que el servidor ya no conoce el trabajo (p. ej. porque se
+        # ha reiniciado): se muestra el error y se deja de consultar
+        if response.status_code != 200:
+            st.session_state['upload_error'] = status.get('error', 'Unknown error')
+            st.session_state['upload_job'] = None
+            st.error(f"Failed to send data to Neo4j: {st.session_state['upload_error']}")
+            return
+        st.session_state['upload_status'] = status
+
+    if status['status'] == 'done':
+        st.success(f"Data successfully sent to Neo4j ({status['rows']} rows)")
+    elif status['status'] == 'failed':
+        st.error(f"Failed to send data to Neo4j: {status['error']}")
+    else:
+        st.info(f"Sending data to Neo4j... {status['rows']} rows "
+                f"({status.get('rows_per_second', 0)} rows/s)")
+
 # Función para cargar el archivo CSV y enviarlo al servidor Flask
 def cargar_csv():
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
@@ -49,18 +112,10 @@ def cargar_csv():
         data = pd.read_csv(uploaded_file)
         st.success("File successfully uploaded")
         st.dataframe(data)
-        
-        # Enviar el archivo CSV al servidor Flask
-        response = requests.post(
-            'http://127.0.0.1:5000/upload_csv',
-            files={'file': uploaded_file.getvalue()}
-        )
-        
-        if response.status_code == 200:
-            st.success("Data successfully sent to Neo4j")
-        else:
-            st.error(f"Failed to send data to Neo4j: {response.json().get('error', 'Unknown error')}")
-        
+
+        enviar_csv(uploaded_file)
+        estado_carga_neo4j()
+
         return data
     return None
 
@@ -1,7 +1,18 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 from neo4j import GraphDatabase
+
+# Paquete ebb del directorio raíz del proyecto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pandas as pd
-import io
+from ebb import COLUMNS, LiveDataset, check_columns, iter_csv_chunks
+from ebb.graphdb import NEO4J_SCHEMA, SCHEMA_GENERIC, SCHEMA_TYPED, typed_statements
 
 app = Flask(__name__)
 
@@ -9,21 +20,129 @@ app = Flask(__name__)
 uri = "bolt://localhost:7687"
 user = "neo4j"
 password = "saulo123"
-driver = GraphDatabase.driver(uri, auth=(user, password))
+# Tiempo máximo (s) que el driver reintenta una transacción ante errores transitorios
+driver = GraphDatabase.driver(uri, auth=(user, password), max_transaction_retry_time=30.0)
+
+# Filas enviadas a Neo4j en cada transacción
+BATCH_SIZE = int(os.environ.get('EBB_NEO4J_BATCH_SIZE', 5000))
+
+MERGE_TRIPLES = """
+UNWIND $rows AS row
+MERGE (n1:Node {id: row.node1})
+MERGE (n2:Node {id: row.node2})
+MERGE (n1)-[:RELATION {label: row.label}]->(n2)
+"""
+
+constraints_ready = False
+
+# Restricción de unicidad sobre :Node(id) para que los MERGE usen su índice
+def create_constraints():
+    global constraints_ready
+    if not constraints_ready:
+        with driver.session() as session:
+            session.run("CREATE CONSTRAINT node_id IF NOT EXISTS FOR (n:Node) REQUIRE n.id IS UNIQUE")
+        constraints_ready = True
+
+def merge_triples(tx, rows):
+    tx.run(MERGE_TRIPLES, rows=rows)
+
+# En el esquema tipado cada lote se reparte en una sentencia por etiqueta de
+# tipo, propiedad o tipo de relación, todas en la misma transacción
+def merge_typed_triples(tx, batch):
+    for query, rows in typed_statements(batch):
+        tx.run(query, rows=rows)
 
-def add_data_to_neo4j(df):
+# Inserta las tripletas por lotes: un UNWIND por lote dentro de una transacción
+# gestionada, que el driver reintenta si falla por un error transitorio.
+# Con EBB_NEO4J_SCHEMA=typed se escriben en el esquema tipado de ebb.graphdb
+# progress(filas) se llama tras cada lote confirmado
+def add_data_to_neo4j(df, batch_size=BATCH_SIZE, progress=None, schema=NEO4J_SCHEMA):
+    if schema not in (SCHEMA_GENERIC, SCHEMA_TYPED):
+        raise ValueError(f"Unknown Neo4j schema: {schema}")
+    create_constraints()
+    df = df[list(COLUMNS)].dropna()
     with driver.session() as session:
-        for index, row in df.iterrows():
-            session.run(
-                """
-                MERGE (n1:Node {id: $node1})
-                MERGE (n2:Node {id: $node2})
-                MERGE (n1)-[:RELATION {label: $label}]->(n2)
-                """,
-                node1=row['node1'],
-                node2=row['node2'],
-                label=row['label']
-            )
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size].astype(str)
+            if schema == SCHEMA_TYPED:
+                session.execute_write(merge_typed_triples, batch)
+            else:
+                session.execute_write(merge_triples, batch.to_dict('records'))
+            if progress is not None:
+                progress(len(batch))
+
+# Cola de trabajos de carga: /upload_csv solo guarda el fichero y encola su
+# ingesta; el estado de cada trabajo se consulta en /upload_status/<job_id>
+UPLOAD_WORKERS = int(os.environ.get('EBB_UPLOAD_WORKERS', 2))
+executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+jobs = {}
+jobs_lock = threading.Lock()
+
+def new_job():
+    job_id = uuid.uuid4().hex
+    with jobs_lock:
+        jobs[job_id] = {
+            "job_id": job_id, "status": "queued", "rows": 0,
+            "started": None, "finished": None, "error": None
+        }
+    return job_id
+
+def update_job(job_id, **fields):
+    with jobs_lock:
+        jobs[job_id].update(fields)
+
+def job_status(job_id):
+    with jobs_lock:
+        job = dict(jobs[job_id])
+    started = job['started']
+    if started is not None:
+        elapsed = (job['finished'] or time.time()) - started
+        job['rows_per_second'] = round(job['rows'] / elapsed, 1) if elapsed > 0 else 0.0
+    return job
+
+# Suma al trabajo las filas de cada lote confirmado en Neo4j
+def job_progress(job_id):
+    def progress(rows):
+        with jobs_lock:
+            jobs[job_id]['rows'] += rows
+    return progress
+
+# Ingesta de un fichero subido: cada bloque se añade al conjunto en vivo y se
+# escribe en Neo4j
+def run_upload_job(job_id, path):
+    update_job(job_id, status='running', started=time.time())
+    try:
+        for chunk in iter_csv_chunks(path, chunksize=BATCH_SIZE * 10):
+            chunk = triples(chunk)
+            live_dataset.append(chunk)
+            add_data_to_neo4j(chunk, progress=job_progress(job_id))
+        update_job(job_id, status='done', finished=time.time())
+    except Exception as e:
+        update_job(job_id, status='failed', finished=time.time(), error=str(e))
+    finally:
+        os.remove(path)
+
+def run_append_job(job_id, rows):
+    update_job(job_id, status='running', started=time.time())
+    try:
+        add_data_to_neo4j(rows, progress=job_progress(job_id))
+        update_job(job_id, status='done', finished=time.time())
+    except Exception as e:
+        update_job(job_id, status='failed', finished=time.time(), error=str(e))
+
+# Conjunto de datos en vivo del servidor con todas las tripletas recibidas:
+# las de los ficheros de /upload_csv según se ingieren y las que /append añade
+# según las graba la caja negra. /summary y /emotion_counts devuelven sus
+# resultados, que se actualizan solo para los robots y humanos afectados
+live_dataset = LiveDataset()
+
+# Tripletas completas de un bloque, como texto: igual que al leer los CSV, un
+# valor como 7 se guarda siempre como '7', llegue por CSV o por JSON
+def triples(rows):
+    return rows[list(COLUMNS)].dropna().astype(str)
+
+def json_response(frame):
+    return app.response_class(frame.to_json(orient='records', date_format='iso'), mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -32,13 +151,65 @@ def index():
 @app.route('/upload_csv', methods=['POST'])
 def upload_csv():
     file = request.files['file']
-    data = file.read().decode('utf-8')
-    df = pd.read_csv(io.StringIO(data))
 
-    print(df.head())  # Agregar esto para ver las primeras filas del DataFrame y las columnas disponibles
+    # Guardar el fichero en disco; la ingesta lo leerá por bloques más tarde
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'wb') as f:
+        file.save(f)
+
+    # Comprobar las columnas antes de aceptar el trabajo
+    try:
+        check_columns(pd.read_csv(path, nrows=0))
+    except ValueError as e:
+        os.remove(path)
+        return jsonify({"error": str(e)}), 400
+
+    job_id = new_job()
+    executor.submit(run_upload_job, job_id, path)
+
+    return jsonify({"message": "Upload accepted", "job_id": job_id}), 202
+
+@app.route('/upload_status/<job_id>', methods=['GET'])
+def upload_status(job_id):
+    if job_id not in jobs:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job_status(job_id)), 200
+
+# Añade tripletas al conjunto en vivo: un fichero CSV ('file') o un JSON con
+# una lista de objetos {node1, label, node2} (directamente o en "rows").
+# Los resultados en memoria se actualizan antes de responder; la escritura en
+# Neo4j se encola como un trabajo más, consultable en /upload_status/<job_id>
+@app.route('/append', methods=['POST'])
+def append_rows():
+    try:
+        if 'file' in request.files:
+            rows = pd.read_csv(request.files['file'], dtype=str)
+        else:
+            payload = request.get_json(silent=True)
+            rows = pd.DataFrame(payload.get('rows') if isinstance(payload, dict) else payload)
+        check_columns(rows)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = triples(rows)
+    actors = live_dataset.append(rows)
+    job_id = new_job()
+    executor.submit(run_append_job, job_id, rows)
+
+    return jsonify({
+        "version": live_dataset.version, "rows": len(live_dataset),
+        "updated_actors": actors.tolist(), "job_id": job_id
+    }), 200
+
+# Resumen por robot y humano del conjunto en vivo
+@app.route('/summary', methods=['GET'])
+def get_summary():
+    return json_response(live_dataset.summary.rename_axis('Actor').reset_index()), 200
 
-    add_data_to_neo4j(df)
-    return jsonify({"message": "Data added successfully"}), 200
+# Recuento de estados emocionales causados por las interacciones de los robots
+@app.route('/emotion_counts', methods=['GET'])
+def get_emotion_counts():
+    return json_response(live_dataset.emotion_counts), 200
 
 @app.route('/graphs', methods=['GET'])
 def get_graphs():
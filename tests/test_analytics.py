@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_triples
+from ebb import INTERACTION_COLUMNS, TripleStore, get_interactions_for_all_robots, get_interactions_for_robot, parse_dates
+
+
+# Bucle original de versionCopy5.py (antes del almacén de tripletas), que se
+# conserva como referencia: recorre la tabla completa en cada consulta
+def legacy_interactions_for_all_robots(data):
+    # Obtener todos los robots
+    robots = data[data['node2'] == 'Robot']['node1'].unique()
+
+    # Inicializar listas para almacenar los resultados
+    robots_list = []
+    interaction_list = []
+    date_interaction_list = []
+    emotional_state_list = []
+    date_emotional_state_list = []
+
+    # Iterar sobre cada robot
+    for selected_robot in robots:
+        # Filtrar las interacciones realizadas por el robot seleccionado
+        interactions = data[(data['label'] == 'performedBy') & (data['node2'] == selected_robot) |
+                    (data['label'] == 'objectOfAction') & (data['node2'] == selected_robot)]
+
+        # Iterar sobre cada interacción
+        for _, interaction_row in interactions.iterrows():
+            interaction = interaction_row['node1']
+
+            # Obtener la fecha de la interacción
+            date_interaction = data[(data['node1'] == interaction) & (data['label'] == 'date')]['node2'].values
+            date_interaction = date_interaction[0] if date_interaction else None
+
+            # Obtener el estado emocional causado por la interacción
+            emotional_state_rows = data[(data['label'] == 'causedBy') & (data['node2'] == interaction)]
+            if not emotional_state_rows.empty:
+                emotional_state_node = emotional_state_rows['node1'].values[0]
+                emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'hasEmotionalState')]['node2'].values
+                emotional_state = emotional_state[0] if emotional_state else None
+
+                # Obtener la fecha del estado emocional
+                date_emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'date')]['node2'].values
+                date_emotional_state = date_emotional_state[0] if date_emotional_state else None
+            else:
+                emotional_state = None
+                date_emotional_state = None
+
+            # Añadir los resultados a las listas
+            robots_list.append(selected_robot)
+            interaction_list.append(interaction)
+            date_interaction_list.append(date_interaction)
+            emotional_state_list.append(emotional_state)
+            date_emotional_state_list.append(date_emotional_state)
+
+    # Crear el DataFrame resultante
+    result_data = pd.DataFrame({
+        'Robot': robots_list,
+        'Interaction': interaction_list,
+        'DateInteraction': date_interaction_list,
+        'EmotionalState': emotional_state_list,
+        'DateEmotionalState': date_emotional_state_list
+     })
+
+    return result_data
+
+
+# Salida del bucle original con las fechas convertidas, como las devuelve el almacén
+def expected_interactions(data):
+    expected = legacy_interactions_for_all_robots(data)
+    for column in ('DateInteraction', 'DateEmotionalState'):
+        expected[column] = parse_dates(expected[column])
+    return expected
+
+
+def assert_same_interactions(result, expected):
+    assert list(result.columns) == INTERACTION_COLUMNS
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False
+    )
+
+
+@pytest.fixture(scope='module', params=[0.7, 0.3])
+def triples(request):
+    return generate_triples(4, 5, 150, emotion_rate=request.param, seed=3)
+
+
+def test_all_robots_match_the_original_loop(triples):
+    result = get_interactions_for_all_robots(TripleStore(triples))
+    assert_same_interactions(result, expected_interactions(triples))
+
+
+def test_one_robot_matches_the_original_loop(triples):
+    store = TripleStore(triples)
+    expected = expected_interactions(triples)
+    for robot in store.nodes_of_type('Robot'):
+        result = get_interactions_for_robot(store, robot)
+        assert_same_interactions(result, expected[expected['Robot'] == robot])
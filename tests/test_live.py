@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_triples
+from ebb import (
+    LiveDataset, TripleStore, count_emotional_states, get_actor_summary, get_emotional_states,
+    get_interactions_for_all_robots
+)
+
+
+# Bloques que recibe un conjunto en vivo: primero los robots, humanos y
+# emociones, y después, para cada interacción, sus tripletas, la causedBy de
+# su estado emocional (antes o después de la interacción) y por último el
+# resto de tripletas del estado, que solo se enlazan a la interacción a
+# través de la causedBy ya recibida
+def live_blocks(data, caused_first):
+    number = data['node1'].str.extract(r'^(?:Interaction|EmotionalState)(\d+)$')[0]
+    blocks = [data[number.isna()]]
+    for _, rows in data[number.notna()].groupby(number[number.notna()].astype(int), sort=True):
+        interaction = rows[rows['node1'].str.startswith('Interaction')]
+        caused = rows[rows['label'] == 'causedBy']
+        state = rows[rows['node1'].str.startswith('EmotionalState') & (rows['label'] != 'causedBy')]
+        blocks += [caused, interaction, state] if caused_first else [interaction, caused, state]
+    return [block for block in blocks if not block.empty]
+
+
+@pytest.fixture(scope='module')
+def triples():
+    return generate_triples(4, 5, 60, emotion_rate=0.6, seed=7)
+
+
+@pytest.mark.parametrize('caused_first', [False, True])
+def test_incremental_results_match_a_full_rebuild(triples, caused_first):
+    blocks = live_blocks(triples, caused_first)
+    live = LiveDataset(TripleStore(blocks[0]))
+    for block in blocks[1:]:
+        live.append(block)
+
+    full = TripleStore(pd.concat(blocks, ignore_index=True))
+    summary = get_actor_summary(full)
+    pd.testing.assert_frame_equal(live.summary.loc[summary.index], summary)
+    assert len(live.summary) == len(summary)
+
+    interactions = get_interactions_for_all_robots(full)
+    pd.testing.assert_frame_equal(live.interactions, interactions)
+
+    counts = count_emotional_states(get_emotional_states(interactions))
+    pd.testing.assert_frame_equal(
+        live.emotion_counts.sort_values(['Count', 'EmotionalState']).reset_index(drop=True),
+        counts.sort_values(['Count', 'EmotionalState']).reset_index(drop=True),
+        check_dtype=False
+    )
+    assert live.version == len(blocks) - 1
@@ -1,3 +1,7 @@
+import math
+import os
+import time
+import uuid
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -8,6 +12,48 @@ import seaborn as sns
 import nbformat
 from nbformat import read
 import requests
+from ebb import (
+    COLUMNS, DatasetCache, LiveDataset, content_hash, count_emotional_states,
+    get_actor_summary, get_actors_info, get_emotional_states, get_human_emotional_states,
+    get_dwell_times, get_emotion_sequences, get_interactions_for_all_robots, get_interactions_for_robot,
+    get_performed_interactions, get_transition_matrix, load_csv, rank_robots_by_transition
+)
+from ebb.browse import PAGE_SIZES, filter_rows, page_rows, sample_rows
+from ebb.charts import (
+    BASE_TEMPLATE, CHART_COUNT, CHART_TIME, color_map, date_bounds, emotion_counts, emotions_over_time, style_figure
+)
+from ebb.graphdb import NEO4J_ERRORS, NEO4J_URI, open_backend
+from ebb.graph import ZOOM_ACTORS, ZOOM_CLUSTERS, ZOOM_FULL, build_graph, graph_html
+from ebb.snapshot import convert_csv, list_snapshots, open_snapshot, save_snapshot, snapshot_info
+from ebb.tail import LiveTail
+
+# Caché de ficheros ya procesados, compartida entre sesiones
+CACHE_MAX_ENTRIES = int(os.environ.get('EBB_CACHE_MAX_ENTRIES', 8))
+CACHE_MAX_MB = int(os.environ.get('EBB_CACHE_MAX_MB', 2048))
+
+# Directorio de las instantáneas de conjuntos de datos y cuántas se muestran en la biblioteca
+SNAPSHOT_DIR = os.environ.get('EBB_SNAPSHOT_DIR', 'snapshots')
+SNAPSHOT_LIBRARY_SIZE = 10
+
+# Seguimiento en vivo: CSV que crece o directorio de segmentos CSV que se
+# propone por defecto, y cada cuántos segundos se buscan filas nuevas
+TAIL_PATH = os.environ.get('EBB_TAIL_PATH', '')
+TAIL_INTERVAL = float(os.environ.get('EBB_TAIL_INTERVAL', 1.0))
+
+# Modo de consulta con Neo4j: con EBB_NEO4J_URI definida, las páginas de
+# robots y humanos pueden consultar la base de datos que llena el servicio
+# Flask en lugar del CSV de la sesión. Sus resultados se cachean NEO4J_CACHE_TTL segundos
+NEO4J_ENABLED = bool(os.environ.get('EBB_NEO4J_URI'))
+NEO4J_CACHE_TTL = int(os.environ.get('EBB_NEO4J_CACHE_TTL', 60))
+SOURCE_CSV = "Uploaded CSV"
+SOURCE_NEO4J = "Neo4j database"
+
+# Temas de las gráficas: el de Streamlit o una plantilla de Plotly
+CHART_THEMES = ['Streamlit', 'plotly_dark', 'plotly', 'plotly_white', 'simple_white', 'ggplot2', 'seaborn']
+CHART_HEIGHT = 450
+
+# Pasos del control del rango de fechas de las gráficas temporales
+DATE_RANGE_STEPS = 500
 
 # Configuración de la página
 st.set_page_config(
@@ -71,14 +117,383 @@ def load_css(file_name):
 
 load_css("style.css")
         
-# Función para cargar el archivo CSV
+# Caché LRU de almacenes de tripletas, única para todo el servidor
+@st.cache_resource
+def get_dataset_cache():
+    return DatasetCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_MB * 1024 * 1024)
+
+# Lee el fichero subido por bloques mostrando el progreso de la carga
+def leer_csv_por_bloques(uploaded_file):
+    progress_bar = st.progress(0.0, text="Reading CSV file...")
+
+    def progress(rows, fraction):
+        progress_bar.progress(fraction or 0.0, text=f"Reading CSV file... {rows:,} rows")
+
+    uploaded_file.seek(0)
+    try:
+        return load_csv(uploaded_file, progress=progress, total_bytes=uploaded_file.size)
+    finally:
+        progress_bar.empty()
+
+# Función para cargar el archivo CSV y construir su almacén de tripletas.
+# El resultado se guarda por huella del contenido, así que los reruns y las
+# sesiones que suben el mismo fichero no vuelven a parsearlo
 def cargar_csv():
-    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
-    if uploaded_file is not None:
-        data = pd.read_csv(uploaded_file)
-        return data
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv", key='csv_file', on_change=olvidar_csv)
+
+    # Un fichero recién subido pasa a ser el conjunto de datos de la sesión;
+    # la huella solo se calcula una vez por fichero
+    if uploaded_file is not None and st.session_state.get('store_file_id') != uploaded_file.file_id:
+        st.session_state['store_key'] = content_hash(uploaded_file.getbuffer())
+        st.session_state['store_file_id'] = uploaded_file.file_id
+        st.session_state['store_name'] = uploaded_file.name
+        st.session_state.pop('store_snapshot', None)
+        st.session_state.pop('store_live', None)
+        st.session_state.pop('store_tail', None)
+
+    if uploaded_file is None or 'store_snapshot' in st.session_state or 'store_live' in st.session_state:
+        # Al volver a esta página el cargador aparece vacío, pero el fichero
+        # ya procesado (la instantánea abierta o el conjunto en vivo) sigue disponible
+        return almacen_actual()
+
+    try:
+        return get_dataset_cache().get_or_build(
+            st.session_state['store_key'],
+            lambda: leer_csv_por_bloques(uploaded_file)
+        )
+    except ValueError as e:
+        st.error(str(e))
     return None
 
+# Almacén del conjunto de datos de la sesión. Las páginas que no muestran el
+# cargador lo recuperan de la caché por su huella; si viene de una instantánea
+# se vuelve a abrir desde disco cuando la caché ya lo ha descartado
+def almacen_actual():
+    store_key = st.session_state.get('store_key')
+    if store_key is None:
+        return None
+    if 'store_live' in st.session_state:
+        dataset = datos_en_vivo()
+        if dataset is not None:
+            return dataset.store
+        st.warning("The appended rows are no longer in memory; showing the original data")
+        st.session_state.pop('store_live')
+    snapshot = st.session_state.get('store_snapshot')
+    if snapshot is None:
+        return get_dataset_cache().get(store_key)
+    try:
+        return get_dataset_cache().get_or_build(store_key, lambda: open_snapshot(snapshot))
+    except (OSError, ValueError) as e:
+        st.error(f"The snapshot could not be opened: {e}")
+    return None
+
+# Olvida el fichero de la sesión cuando el usuario lo quita del cargador
+def olvidar_csv():
+    if st.session_state.get('csv_file') is None and 'store_snapshot' not in st.session_state \
+            and 'store_tail' not in st.session_state:
+        st.session_state.pop('store_key', None)
+        st.session_state.pop('store_file_id', None)
+        st.session_state.pop('store_live', None)
+
+# Abre una instantánea de la biblioteca como conjunto de datos de la sesión
+def abrir_snapshot(info):
+    st.session_state['store_key'] = info['key']
+    st.session_state['store_name'] = info['name']
+    st.session_state['store_snapshot'] = info['path']
+    st.session_state.pop('store_live', None)
+    st.session_state.pop('store_tail', None)
+
+# Conjunto de datos en vivo de la sesión, si se le han añadido filas
+def datos_en_vivo():
+    tail = st.session_state.get('store_tail')
+    if tail is not None:
+        return seguimiento(tail).dataset
+    live_key = st.session_state.get('store_live')
+    return None if live_key is None else get_dataset_cache().get(live_key)
+
+# Seguimiento de un CSV que crece o de un directorio de segmentos, compartido
+# por todas las sesiones que siguen la misma ruta: las filas nuevas se leen
+# una sola vez, a partir del último byte leído
+@st.cache_resource
+def seguimiento(path):
+    return LiveTail(path)
+
+# Pasa la sesión a seguir en vivo la ruta indicada
+def seguir_en_vivo(path):
+    if not os.path.exists(path):
+        st.error(f"File or directory not found: {path}")
+        return
+    path = os.path.realpath(path)
+    try:
+        seguimiento(path)
+    except (OSError, ValueError) as e:
+        st.error(str(e))
+        return
+    key = f"tail-{content_hash(path.encode())}"
+    st.session_state['store_tail'] = path
+    st.session_state['store_live'] = key
+    st.session_state['store_key'] = key
+    st.session_state['store_name'] = os.path.basename(path)
+    st.session_state.pop('store_snapshot', None)
+    st.rerun()
+
+# Deja de seguir la ruta; si el cargador conserva un fichero, vuelve a ser el de la sesión
+def dejar_de_seguir():
+    for state in ('store_tail', 'store_live', 'store_key', 'store_file_id', 'tail_version'):
+        st.session_state.pop(state, None)
+
+# Busca filas nuevas cada TAIL_INTERVAL segundos. Solo se vuelve a ejecutar
+# este fragmento; la aplicación entera se actualiza cuando el conjunto en vivo
+# cambia de versión, y las estadísticas se recalculan solo para los actores
+# afectados por las filas nuevas, sin volver a analizar el fichero
+@st.fragment(run_every=TAIL_INTERVAL)
+def actualizar_en_vivo():
+    if 'store_tail' not in st.session_state:
+        return
+    tail = seguimiento(st.session_state['store_tail'])
+    try:
+        tail.poll()
+    except (OSError, ValueError) as e:
+        st.error(f"The new rows could not be read: {e}")
+    for path, error in tail.errors.items():
+        st.warning(f"Skipping {os.path.basename(path)}: {error}")
+    version = tail.dataset.version
+    st.caption(f"Watching {tail.path}: {len(tail.dataset):,} rows, "
+               f"last update {time.strftime('%H:%M:%S', time.localtime(tail.updated))}")
+    if st.session_state.setdefault('tail_version', version) != version:
+        st.session_state['tail_version'] = version
+        st.rerun(scope='app')
+
+# Añade las tripletas de un CSV al conjunto de datos de la sesión. La primera
+# vez se crea un conjunto en vivo sobre una copia del almacén, porque el de la
+# caché lo comparten las sesiones que subieron el mismo fichero; después solo
+# se recalculan los robots y humanos afectados por las filas nuevas
+def anadir_filas(store, uploaded_file):
+    dataset = datos_en_vivo()
+    if dataset is None:
+        dataset = LiveDataset(store.copy())
+        st.session_state['store_live'] = f"live-{uuid.uuid4().hex}"
+    try:
+        uploaded_file.seek(0)
+        rows = pd.read_csv(uploaded_file, dtype=str)
+        actors = dataset.append(rows)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    # Se vuelve a guardar para que la caché cuente la memoria de las filas nuevas
+    get_dataset_cache().put(st.session_state['store_live'], dataset)
+    st.success(f"{len(rows):,} rows appended; {len(actors)} robots and humans updated")
+
+# Clave de los resultados cacheados del almacén de la sesión: la huella del
+# fichero o, si se le han añadido filas, la versión en vivo
+def clave_datos():
+    dataset = datos_en_vivo()
+    if dataset is None:
+        return st.session_state['store_key']
+    return f"{st.session_state['store_live']}:{dataset.version}"
+
+# Clave de los resultados que pueden venir del almacén o de Neo4j (gráficas y
+# ranking). Con Neo4j cambia cada NEO4J_CACHE_TTL segundos, como la caché de
+# sus consultas; lo que se calcula sobre el almacén usa siempre clave_datos()
+def clave_resultados():
+    if usa_neo4j():
+        return f"neo4j:{NEO4J_URI}:{int(time.time() // NEO4J_CACHE_TTL)}"
+    return clave_datos()
+
+# Convierte un CSV del servidor en una instantánea en disco, leyéndolo por
+# bloques, y la abre con mapeo de memoria. Sirve para ficheros que no caben en
+# memoria ni se pueden subir por el navegador; la clave depende de la ruta, el
+# tamaño y la fecha de modificación, así que un fichero ya convertido se reabre
+def abrir_csv_servidor(path):
+    if not os.path.isfile(path):
+        st.error(f"File not found: {path}")
+        return
+    stat = os.stat(path)
+    key = content_hash(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    snapshot = os.path.join(SNAPSHOT_DIR, key)
+
+    if snapshot not in [info['path'] for info in list_snapshots(SNAPSHOT_DIR)]:
+        progress_bar = st.progress(0.0, text="Converting CSV file...")
+
+        def progress(rows, fraction):
+            progress_bar.progress(fraction or 0.0, text=f"Converting CSV file... {rows:,} rows")
+
+        try:
+            with open(path, 'rb') as source:
+                convert_csv(source, SNAPSHOT_DIR, key, os.path.basename(path),
+                            progress=progress, total_bytes=stat.st_size)
+        except (OSError, ValueError) as e:
+            st.error(str(e))
+            return
+        finally:
+            progress_bar.empty()
+
+    abrir_snapshot(snapshot_info(snapshot))
+    st.rerun()
+
+# HTML del grafo de conocimiento generado a partir de las tripletas subidas,
+# cacheado por la huella del fichero y el nivel de detalle (store no forma
+# parte de la clave)
+@st.cache_data(max_entries=4 * CACHE_MAX_ENTRIES)
+def knowledge_graph(store_key, _store, zoom, expand):
+    graph = build_graph(_store, zoom=zoom, expand=expand)
+    return graph_html(graph), len(graph['nodes']), graph['total_nodes'], graph['zoom'], graph['clusters']
+
+GRAPH_ZOOM_NAMES = {
+    None: "Auto",
+    ZOOM_ACTORS: "Robots and humans",
+    ZOOM_CLUSTERS: "Interactions grouped by actor",
+    ZOOM_FULL: "Full graph"
+}
+
+# Resumen de interacciones y emociones de todos los robots, cacheado por la
+# huella del fichero subido
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def interacciones_todos_los_robots(store_key, _store):
+    return get_interactions_for_all_robots(_store)
+
+# Resumen por actor (interacciones realizadas y recibidas, estados emocionales,
+# primera y última fecha), calculado una sola vez por fichero subido
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def resumen_actores(store_key, _store):
+    return get_actor_summary(_store)
+
+# Estados emocionales de todos los humanos con la interacción que los causó,
+# extraídos de una vez por fichero (o versión en vivo) y filtrados por humano al mostrarlos
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def estados_humanos(store_key, _store):
+    return get_human_emotional_states(_store)
+
+# Figuras de emociones ya construidas, cacheadas por la huella del conjunto de
+# datos, el robot (None para todos), el tipo de gráfica y el rango de fechas
+# visible. Se comparten entre sesiones sin copiarlas, así que no se modifican nunca
+@st.cache_resource(max_entries=4 * CACHE_MAX_ENTRIES)
+def figura_emociones(store_key, robot, kind, date_range, _data, _colors):
+    if kind == CHART_TIME:
+        return emotions_over_time(_data, 'Robot' if robot is None else 'EmotionalState', _colors, date_range)
+    return emotion_counts(_data, _colors)
+
+# Copia de la figura cacheada con el tema y la altura elegidos. Cambiar el
+# estilo solo modifica el layout, y volver a mostrarla solo la serializa
+@st.cache_resource(max_entries=4 * CACHE_MAX_ENTRIES)
+def figura_con_estilo(store_key, robot, kind, date_range, template, height, _data, _colors):
+    return style_figure(figura_emociones(store_key, robot, kind, date_range, _data, _colors), template, height)
+
+def mostrar_figura(robot, kind, data, colors, date_range=None):
+    theme = st.session_state.get('chart_theme', CHART_THEMES[0])
+    template = BASE_TEMPLATE if theme == 'Streamlit' else theme
+    height = st.session_state.get('chart_height', CHART_HEIGHT)
+    fig = figura_con_estilo(clave_resultados(), robot, kind, date_range, template, height, data, colors)
+    st.plotly_chart(fig, theme='streamlit' if theme == 'Streamlit' else None)
+
+# Secuencias de estados emocionales fechados de todos los robots y humanos,
+# extraídas de una vez por fichero (o versión en vivo); de ellas salen las
+# matrices de transiciones, los tiempos de permanencia y el ranking de robots
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def secuencias_emocionales(store_key, _store):
+    return get_emotion_sequences(_store)
+
+# Robots que más veces llevaron a un humano al estado elegido (por defecto 'Angry')
+@st.cache_data(max_entries=4 * CACHE_MAX_ENTRIES)
+def ranking_de_robots(store_key, target, _sequences):
+    return rank_robots_by_transition(_sequences, target)
+
+# Matriz de transiciones entre estados emocionales y tiempo de permanencia en
+# cada estado de un robot o un humano
+def mostrar_transiciones(store, actor):
+    sequences = secuencias_de_la_sesion(store)
+    matrix = get_transition_matrix(sequences, actor)
+    if matrix.empty:
+        st.info(f"No dated emotional state changes found for {actor}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.imshow(matrix, text_auto=True, color_continuous_scale='Blues',
+                        title='Emotional State Transitions',
+                        labels={'x': 'To', 'y': 'From', 'color': 'Transitions'},
+                        template=BASE_TEMPLATE)
+        st.plotly_chart(fig)
+    with col2:
+        st.markdown('<div style="color:#00a9e0; font-size: 20px;">Time spent in each emotional state</div>', unsafe_allow_html=True)
+        dwell = get_dwell_times(sequences, actor).droplevel('Actor')
+        st.dataframe(dwell.apply(lambda column: column.dt.round('s') if column.dtype.kind == 'm' else column))
+
+# Rango de fechas visible en la gráfica de estados emocionales a lo largo del
+# tiempo; los eventos se agrupan en intervalos cuyo ancho sigue a este rango.
+# Devuelve None si se ve todo el rango
+def rango_de_fechas(emotional_data, key):
+    bounds = date_bounds(emotional_data)
+    if bounds is None or bounds[0] == bounds[1]:
+        return None
+    start, end = (bound.to_pydatetime() for bound in bounds)
+    step = max(pd.Timedelta(end - start) / DATE_RANGE_STEPS, pd.Timedelta(seconds=1)).ceil('s')
+    selected = st.slider("Date range", start, end, (start, end), step=step.to_pytimedelta(),
+                         format="YYYY-MM-DD HH:mm", key=f"{key}_{start}_{end}")
+    if selected == (start, end):
+        return None
+    return pd.Timestamp(selected[0]), pd.Timestamp(selected[1])
+
+# Driver de Neo4j con su pool de conexiones, compartido por todas las
+# sesiones; las consultas siguen el esquema de EBB_NEO4J_SCHEMA
+@st.cache_resource
+def conexion_neo4j():
+    return open_backend()
+
+def usa_neo4j():
+    return NEO4J_ENABLED and st.session_state.get('data_source') == SOURCE_NEO4J
+
+# Resultado de un método de Neo4jBackend, cacheado por método y argumentos
+@st.cache_data(ttl=NEO4J_CACHE_TTL, max_entries=16 * CACHE_MAX_ENTRIES, show_spinner="Querying Neo4j...")
+def consulta_neo4j(method, *args):
+    return getattr(conexion_neo4j(), method)(*args)
+
+def consultar(method, *args):
+    try:
+        return consulta_neo4j(method, *args)
+    except NEO4J_ERRORS as e:
+        st.error(f"The Neo4j query failed: {e}")
+        st.stop()
+
+# Resultados del conjunto de datos de la sesión: los de Neo4j en modo base de
+# datos, los que mantiene al día el conjunto en vivo o, si no se le han
+# añadido filas, los cacheados
+def resumen_de_la_sesion(store):
+    if usa_neo4j():
+        return consultar('actor_summary')
+    dataset = datos_en_vivo()
+    return resumen_actores(clave_datos(), store) if dataset is None else dataset.summary
+
+def interacciones_de_la_sesion(store):
+    if usa_neo4j():
+        return consultar('interactions_for_all_robots')
+    dataset = datos_en_vivo()
+    return interacciones_todos_los_robots(clave_datos(), store) if dataset is None else dataset.interactions
+
+def conteo_emociones_de_la_sesion(emotional_data):
+    if usa_neo4j():
+        return consultar('emotion_counts')
+    dataset = datos_en_vivo()
+    return count_emotional_states(emotional_data) if dataset is None else dataset.emotion_counts
+
+def nodos_de_tipo(store, node_type):
+    return consultar('nodes_of_type', node_type) if usa_neo4j() else store.nodes_of_type(node_type)
+
+def info_actores(store, actor_type):
+    return consultar('actors_info', actor_type) if usa_neo4j() else get_actors_info(store, actor_type)
+
+def interacciones_del_robot(store, robot):
+    return consultar('interactions_for_robot', robot) if usa_neo4j() else get_interactions_for_robot(store, robot)
+
+def interacciones_realizadas(store, actor):
+    return consultar('performed_interactions', actor) if usa_neo4j() else get_performed_interactions(store, actor)
+
+def estados_de_los_humanos(store):
+    return consultar('human_emotional_states') if usa_neo4j() else estados_humanos(clave_datos(), store)
+
+def secuencias_de_la_sesion(store):
+    return consultar('emotion_sequences') if usa_neo4j() else secuencias_emocionales(clave_datos(), store)
+
 # Función para cargar y leer un notebook Jupyter
 def load_notebook(uploaded_file):
     nb = read(uploaded_file, as_version=4)
@@ -113,38 +528,281 @@ def get_experiment_info(experiment_id):
     else:
         return None
     
-# Tabs
-tab1, tab2, tab3, tab4 = st.tabs(["Upload CSV","ML Model" ,"Robot Statistics", "Human Statistics"])
+# Filas que cumplen los filtros de la tabla de tripletas. Se cachea como
+# recurso para no copiar el array de posiciones en cada rerun
+@st.cache_resource(max_entries=4 * CACHE_MAX_ENTRIES)
+def filas_filtradas(store_key, _store, node1, label, node2):
+    return filter_rows(_store, node1, label, node2)
+
+# Tabla de tripletas paginada en el servidor: al navegador solo se envía la
+# página visible, o una muestra aleatoria, de las filas que cumplen los
+# filtros, en lugar de la tabla completa en cada rerun. Es un fragmento:
+# filtrar o cambiar de página no vuelve a ejecutar el resto de la página
+@st.fragment
+def tabla_tripletas(store):
+    col1, col2, col3 = st.columns(3)
+    node1 = col1.text_input("node1 contains", key='table_node1')
+    label = col2.text_input("label contains", key='table_label')
+    node2 = col3.text_input("node2 contains", key='table_node2')
+    positions = filas_filtradas(clave_datos(), store, node1, label, node2)
+    total = len(store) if positions is None else len(positions)
+
+    col1, col2, col3 = st.columns([2, 1, 2])
+    mode = col1.radio("View", ["Pages", "Random sample"], horizontal=True, key='table_mode')
+    size = col2.selectbox("Rows", PAGE_SIZES, key='table_rows')
+    if mode == "Pages":
+        pages = max(1, math.ceil(total / size))
+        # La página elegida puede quedar fuera de rango al filtrar
+        st.session_state['table_page'] = min(st.session_state.get('table_page', 1), pages)
+        page = col3.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key='table_page')
+        window = page_rows(store, positions, page - 1, size)
+    else:
+        if col3.button("New sample"):
+            st.session_state['table_seed'] = st.session_state.get('table_seed', 0) + 1
+        window = sample_rows(store, positions, size, seed=st.session_state.get('table_seed', 0))
+
+    st.caption(f"{total:,} of {len(store):,} rows match the filters")
+    st.dataframe(window)
+
+# Sección del grafo de conocimiento. Es un fragmento: cambiar el nivel de
+# detalle o las agrupaciones abiertas solo vuelve a ejecutar esta sección
+@st.fragment
+def seccion_grafo(store):
+    zoom = st.select_slider("Level of detail", options=list(GRAPH_ZOOM_NAMES),
+                            format_func=GRAPH_ZOOM_NAMES.get)
+
+    # Generar el HTML del grafo a partir del CSV subido
+    expand = tuple(st.session_state.get('graph_expand', []))
+    html_content, shown_nodes, total_nodes, shown_zoom, clusters = knowledge_graph(
+        clave_datos(), store, zoom, expand
+    )
+    if shown_zoom == ZOOM_CLUSTERS:
+        st.session_state['graph_expand'] = [actor for actor in expand if actor in clusters]
+        st.multiselect("Expand the interactions of", clusters, key='graph_expand')
+    if shown_nodes < total_nodes:
+        st.caption(f"Showing the {shown_nodes} most connected of {total_nodes} nodes")
+
+    # Mostrar el contenido HTML en Streamlit
+    components.html(html_content, height=600)
+
+# Estadísticas del robot seleccionado; al cambiar de robot solo se vuelve a
+# ejecutar este fragmento, no el resumen de todos los robots
+@st.fragment
+def estadisticas_robot(store):
+    # Filtrar por node1 cuando node2 = 'Robot'
+    robot_names = nodos_de_tipo(store, 'Robot')
+
+    st.markdown ("# Statistics for each robot")           
+    st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Select a robot</div>', unsafe_allow_html=True)
+    selected_robot = st.selectbox("", robot_names)
+    st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
+
+    st.markdown (f"# Interactions carried out by {selected_robot}:")
+
+    col1, col2 = st.columns([1, 1])
+
+    # Sin robots en los datos el selector no devuelve ninguno
+    total_Robot_Interactions = 0
+    if selected_robot is not None:
+        total_Robot_Interactions = int(resumen_de_la_sesion(store).at[selected_robot, 'Performed'])
+
+    with col1:
+        st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Overview</div>', unsafe_allow_html=True)
+        st.metric(label="Total Interactions", value=total_Robot_Interactions, delta=f"{total_Robot_Interactions} 🟢")
+
+        st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Interactions Status</div>', unsafe_allow_html=True)
+        st.success(f"The robot {selected_robot} has carried out a total of {total_Robot_Interactions} interactions.")
+
+    st.markdown('<div style="color:#00629b; font-size: 35px;"> </div>', unsafe_allow_html=True)
+
+    st.markdown('<div style="color:#00629b; font-size: 35px;"></div>', unsafe_allow_html=True)
+
+    st.markdown ("# Emotions for each robot")
+    st.markdown('<div style="color:#00629b; font-size: 35px;"></div>', unsafe_allow_html=True)
+
+    if selected_robot:
+        result_data = interacciones_del_robot(store, selected_robot)
+
+        # Filtrar los datos para EmotionalState no nulos, con las fechas ya convertidas
+        emotional_data = get_emotional_states(result_data)
+
+        if not emotional_data.empty:
+
+            # Asignar colores específicos a cada emoción
+            color_map_emotions = color_map(emotional_data['EmotionalState'].unique())
+
+            # Crear la leyenda utilizando Streamlit
+            legend_items = []
+            for emotion, color in color_map_emotions.items():
+                legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
+                                    f"<div style='width: 20px; height: 20px; background-color: {color}; margin-right: 10px;'></div>"
+                                    f"<div style='font-size: 16px;'>{emotion}</div></div>")
+            legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(legend_items) + "</div>"
+
+            st.markdown(legend_html, unsafe_allow_html=True)
+
+            # Mostrar ambas gráficas una al lado de la otra
+            col1, col2 = st.columns(2)
+            with col1:
+                date_range = rango_de_fechas(emotional_data, f"date_range_{selected_robot}")
+                mostrar_figura(selected_robot, CHART_TIME, emotional_data, color_map_emotions, date_range)
+            with col2:
+                mostrar_figura(selected_robot, CHART_COUNT, count_emotional_states(emotional_data), color_map_emotions)
+
+        st.markdown (f"# Emotion transitions of {selected_robot}")
+        mostrar_transiciones(store, selected_robot)
+
+# Ranking de los robots cuyas interacciones llevan a los humanos a un estado
+# emocional desde otro distinto; al cambiar de estado solo se vuelve a ejecutar este fragmento
+@st.fragment
+def ranking_transiciones(store):
+    sequences = secuencias_de_la_sesion(store)
+    states = sorted(sequences['EmotionalState'].unique())
+    if not states:
+        return
+
+    st.markdown ("# Robots that tip humans into an emotional state")
+    target = st.selectbox("Emotional state", states, index=states.index('Angry') if 'Angry' in states else 0)
+    ranking = ranking_de_robots(clave_resultados(), target, sequences)
+    st.dataframe(ranking, column_config={
+        'Transitions': st.column_config.NumberColumn("Human state changes", help="Emotional state changes of humans caused by the robot's interactions"),
+        'Tipped': st.column_config.NumberColumn(f"Into {target}", help=f"Changes from another state into {target}"),
+        'Rate': st.column_config.ProgressColumn("Rate", format='percent', min_value=0, max_value=1)
+    })
+
+# Interacciones y estados emocionales del humano seleccionado (fragmento)
+@st.fragment
+def estadisticas_humano(store):
+    # Filtrar por node1 cuando node2 = 'Human'
+    human_names = nodos_de_tipo(store, 'Human')
+
+    st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Select a human</div>', unsafe_allow_html=True)
+    selected_human = st.selectbox("", human_names)
+    st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
+
+    interactions = nodos_de_tipo(store, 'Action')
+    # Sin humanos en los datos el selector no devuelve ninguno (y None no filtra por actor)
+    interactionsByHuman = pd.DataFrame(columns=COLUMNS)
+    if selected_human is not None:
+        interactionsByHuman = interacciones_realizadas(store, selected_human)
+
+    st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Interactions carried out by {selected_human}:</div>', unsafe_allow_html=True)
+
+    col1, col2 = st.columns([1, 1])
 
-with tab1:
+    total_Human_Interactions = 0
+    if selected_human is not None:
+        total_Human_Interactions = int(resumen_de_la_sesion(store).at[selected_human, 'Performed'])
+
+    with col1:
+        for interaction_id, interactionByHuman in interactionsByHuman.groupby('node1', sort=False, observed=True):
+            st.write(f"Interaction: {interaction_id}")
+            st.write(interactionByHuman)
+
+    with col2:
+        st.markdown('<div style="color:#00629b; font-size: 35px;">Overview</div>', unsafe_allow_html=True)
+        st.metric(label="Total Interactions", value=total_Human_Interactions, delta=f"{total_Human_Interactions} 🟢")
+
+        st.markdown('<div style="color:#00629b; font-size: 35px;">Interactions Status</div>', unsafe_allow_html=True)
+        st.success(f"The human {selected_human} has carried out a total of {total_Human_Interactions} interactions.")
+
+        st.markdown('<div style="color:#00629b; font-size: 35px;">Progress</div>', unsafe_allow_html=True)
+        st.progress(total_Human_Interactions / len(interactions) if len(interactions) > 0 else 0)
+
+    st.markdown('<div style="color:#00629b; font-size: 35px;"> </div>', unsafe_allow_html=True)    
+    st.markdown('<div style="color:#00629b; font-size: 35px;">Display data on status changes</div>', unsafe_allow_html=True)
+
+    # Agregar un contenedor expandible
+    with st.expander(f"Emotional state changes by {selected_human}"):
+        emotional_states = estados_de_los_humanos(store)
+        emotional_states_data = emotional_states[emotional_states['Human'] == selected_human]
+
+        if not emotional_states_data.empty:
+            st.dataframe(emotional_states_data.drop(columns='Human'), hide_index=True)
+        else:
+            st.warning(f"No emotional state data found for {selected_human}")
+
+        st.markdown('<div style="color:#00629b; font-size: 35px;">Graph of Emotional States</div>', unsafe_allow_html=True)
+
+        if not emotional_states_data.empty:
+            fig = go.Figure()
+
+            emotional_states_count = emotional_states_data['EmotionalState'].value_counts()
+            fig.add_trace(go.Bar(
+                x=emotional_states_count.index,
+                y=emotional_states_count.values,
+                marker_color='blue'
+            ))
+
+            fig.update_layout(
+                title=f"Emotional State Distribution for {selected_human}",
+                xaxis_title="Emotional State",
+                yaxis_title="Count",
+                title_x=0.5
+            )
+
+            st.plotly_chart(fig)
+        else:
+            st.warning(f"No emotional state data found for {selected_human}")
+
+    with st.expander(f"Emotion transitions of {selected_human}"):
+        mostrar_transiciones(store, selected_human)
+
+# Páginas del cuadro de mando. Solo se ejecuta la página visible, a diferencia
+# de st.tabs, que ejecuta el contenido de todas las pestañas en cada rerun
+def pagina_cargar_csv():
     st.markdown ("# Upload CSV file")
-    data = cargar_csv()
-    if data is not None:
+    store = cargar_csv()
+    with st.expander("Live tail", expanded='store_tail' in st.session_state):
+        if 'store_tail' in st.session_state:
+            st.button("Stop watching", on_click=dejar_de_seguir)
+        else:
+            ruta_en_vivo = st.text_input("Growing CSV file or directory of CSV segments", value=TAIL_PATH)
+            if st.button("Start watching", disabled=not ruta_en_vivo):
+                seguir_en_vivo(ruta_en_vivo)
+    with st.expander("Files larger than memory"):
+        ruta = st.text_input("Path of a CSV file on the server")
+        if st.button("Convert and open", disabled=not ruta):
+            abrir_csv_servidor(ruta)
+    if store is not None:
         st.success("File successfully uploaded")
+        if 'store_snapshot' not in st.session_state and 'store_live' not in st.session_state and st.button("Save snapshot"):
+            try:
+                save_snapshot(store, SNAPSHOT_DIR, st.session_state['store_key'], st.session_state['store_name'])
+                st.session_state['store_snapshot'] = os.path.join(SNAPSHOT_DIR, st.session_state['store_key'])
+                st.rerun()
+            except (OSError, ValueError) as e:
+                st.error(f"The snapshot could not be saved: {e}")
+        if store.mapped:
+            st.caption("Snapshots opened from disk are read-only: upload the CSV file to append new rows")
+        elif 'store_tail' not in st.session_state:
+            with st.expander("Append new rows"):
+                new_rows = st.file_uploader("CSV file with new triples", type="csv", key='append_file')
+                if st.button("Append", disabled=new_rows is None):
+                    anadir_filas(store, new_rows)
+                    store = almacen_actual()
         st.markdown("# CSV analysis")
-        st.dataframe(data)
+        tabla_tripletas(store)
 
     st.markdown("# Knowledge Graph")
-    if data is not None:
-        # Leer el archivo HTML
-        with open("graph.html", "r", encoding='utf-8') as f:
-            html_content = f.read()
-
-        # Mostrar el contenido HTML en Streamlit
-        components.html(html_content, height=600)
+    if store is not None:
+        seccion_grafo(store)
     else:
         st.warning("Please upload a CSV file in the 'Upload CSV' tab")
         
-with tab2:
+def pagina_modelo():
+    store = almacen_actual()
     st.markdown('<div style="color:#00629b; font-size: 40px;">Subir archivo de notebook</div>', unsafe_allow_html=True)
     
-    if data is not None:
-        if 'node1' in data.columns and 'node2' in data.columns:
-            model_names = data[data['node2'] == 'MOdel']['node1'].unique()    
+    if store is not None:
+        # Nodos con node2 = 'MOdel' en cualquier relación, comparando códigos
+        model_names = store.decode(pd.unique(store.codes1[store.positions(node2='MOdel')]))
     else:
         st.warning("Por favor, sube un archivo de Jupyter Notebook en la pestaña 'Subir notebook'")
         
-with tab3:
+def pagina_robots():
+    # Con Neo4j no hay tripletas locales: las consultas van a la base de datos
+    store = None if usa_neo4j() else almacen_actual()
     st.markdown("""
         <style>
             .main-title {
@@ -199,456 +857,159 @@ with tab3:
 
     st.markdown("<div class='main-title'>Robot Statistics 🤖</div>", unsafe_allow_html=True)
     
-    if data is not None:
-        if 'node1' in data.columns and 'node2' in data.columns:
-            # Contar robots
-            robots = data[data['node2'] == 'Robot']['node1'].unique()
-            num_robots = len(robots)
-
-            st.markdown(f"""
-                <div class='stat-box'>
-                    <div>Number of Robots</div>
-                    <div class='stat-number'>{num_robots}</div>
-                    <div class='robot-icons'>{'🤖 ' * num_robots}</div>
-                </div>
-            """, unsafe_allow_html=True)
+    if usa_neo4j() or store is not None:
+        # Contar robots
+        robots = nodos_de_tipo(store, 'Robot')
+        num_robots = len(robots)
+
+        st.markdown(f"""
+            <div class='stat-box'>
+                <div>Number of Robots</div>
+                <div class='stat-number'>{num_robots}</div>
+                <div class='robot-icons'>{'🤖 ' * num_robots}</div>
+            </div>
+        """, unsafe_allow_html=True)
             
         # Lógica adicional para obtener el valor de label para cada robot
         st.markdown("<div class='main-title'>Information about each Robot</div>", unsafe_allow_html=True)
         
-        if 'node1' in data.columns and 'node2' in data.columns and 'label' in data.columns:
-            # Filtrar los nombres de los robots
-            robot_names = data[data['node2'] == 'Robot']['node1'].unique()
-
-            results = []
-            for robot in robot_names:
-                label_value = data[(data['node1'] == robot) & (data['label'] == 'type')]['node2'].values
-                label_value1 = data[(data['node1'] == robot) & (data['label'] == 'label')]['node2'].values
-                if len(label_value) > 0:
-                    results.append((robot, label_value[0], label_value1[0]))
-
-            if results:
-                st.markdown("<div class='card-container'>", unsafe_allow_html=True)
-                for robot, type_value, name_value in results:
-                    st.markdown(f"""
-                        <div class='card'>
-                            <div class='card-title'>{robot}</div>
-                            <div class='card-content'>Type: {type_value}</div>
-                            <div class='card-content'>Name: {name_value}</div>
-                        </div>
-                    """, unsafe_allow_html=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-            else:
-                st.warning("No values found for the specified robots.")
-
-            if 'label' in data.columns and 'node1' in data.columns and 'node2' in data.columns:
-                
-                def get_interactions_for_all_robots(data):
-                    # Obtener todos los robots
-                    robots = data[data['node2'] == 'Robot']['node1'].unique()
-    
-                    # Inicializar listas para almacenar los resultados
-                    robots_list = []
-                    interaction_list = []
-                    date_interaction_list = []
-                    emotional_state_list = []
-                    date_emotional_state_list = []
-
-                    # Iterar sobre cada robot
-                    for selected_robot in robots:
-                        # Filtrar las interacciones realizadas por el robot seleccionado
-                        interactions = data[(data['label'] == 'performedBy') & (data['node2'] == selected_robot) | 
-                                    (data['label'] == 'objectOfAction') & (data['node2'] == selected_robot)]
-        
-                        # Iterar sobre cada interacción
-                        for _, interaction_row in interactions.iterrows():
-                            interaction = interaction_row['node1']
-            
-                            # Obtener la fecha de la interacción
-                            date_interaction = data[(data['node1'] == interaction) & (data['label'] == 'date')]['node2'].values
-                            date_interaction = date_interaction[0] if date_interaction else None
-            
-                            # Obtener el estado emocional causado por la interacción
-                            emotional_state_rows = data[(data['label'] == 'causedBy') & (data['node2'] == interaction)]
-                            if not emotional_state_rows.empty:
-                                emotional_state_node = emotional_state_rows['node1'].values[0]
-                                emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'hasEmotionalState')]['node2'].values
-                                emotional_state = emotional_state[0] if emotional_state else None
-
-                                # Obtener la fecha del estado emocional
-                                date_emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'date')]['node2'].values
-                                date_emotional_state = date_emotional_state[0] if date_emotional_state else None
-                            else:
-                                emotional_state = None
-                                date_emotional_state = None
-
-                            # Añadir los resultados a las listas
-                            robots_list.append(selected_robot)
-                            interaction_list.append(interaction)
-                            date_interaction_list.append(date_interaction)
-                            emotional_state_list.append(emotional_state)
-                            date_emotional_state_list.append(date_emotional_state)
-
-                    # Crear el DataFrame resultante
-                    result_data = pd.DataFrame({
-                        'Robot': robots_list,
-                        'Interaction': interaction_list,
-                        'DateInteraction': date_interaction_list,
-                        'EmotionalState': emotional_state_list,
-                        'DateEmotionalState': date_emotional_state_list
-                     })
-
-                    return result_data
-
-            st.markdown ("# Emotions resume for all robots")
-            st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
-
-            result_data = get_interactions_for_all_robots(data)
-
-            # Filtrar los datos para EmotionalState no nulos
-            emotional_data = result_data[result_data['EmotionalState'].notnull()]
-
-            if not emotional_data.empty:
-                # Formatear las fechas
-                emotional_data['DateEmotionalState'] = emotional_data['DateEmotionalState'].str.lstrip('^')
-                emotional_data['DateEmotionalState'] = pd.to_datetime(emotional_data['DateEmotionalState'], format='%Y-%m-%dT%H:%M:%SZ')
-
-                # Asignar colores específicos a cada emoción
-                unique_emotions = emotional_data['EmotionalState'].unique()
-                emotion_colors = px.colors.qualitative.Plotly[:len(unique_emotions)]
-                emotion_color_map = dict(zip(unique_emotions, emotion_colors))
-
-                # Asignar colores específicos a cada robot
-                unique_robots = emotional_data['Robot'].unique()
-                robot_colors = px.colors.qualitative.Plotly[:len(unique_robots)]
-                robot_color_map = dict(zip(unique_robots, robot_colors))
-
-                # Generar la gráfica de estados emocionales a lo largo del tiempo
-                fig_time = px.line(emotional_data, x='DateEmotionalState', y='EmotionalState', 
-                                title='Emotional States Over Time', 
-                                labels={'DateEmotionalState': 'Date', 'EmotionalState': 'Emotional State'},
-                                color='Robot', 
-                                markers=True,
-                                template='plotly_dark',
-                                color_discrete_map=robot_color_map)
-
-                fig_time.update_traces(marker=dict(size=10), selector=dict(mode='markers'))
-                fig_time.update_layout(xaxis_title='Date', yaxis_title='Emotional State', showlegend=False)
-
-                # Generar la gráfica de recuento de sentimientos
-                emotional_count = emotional_data['EmotionalState'].value_counts().reset_index()
-                emotional_count.columns = ['EmotionalState', 'Count']
-
-                fig_count = px.bar(emotional_count, x='EmotionalState', y='Count', 
-                                title='Count of Emotional States', 
-                                labels={'EmotionalState': 'Emotional State', 'Count': 'Count'},
-                                color='EmotionalState',
-                                color_discrete_map=emotion_color_map,
-                                template='plotly_dark')
-
-                fig_count.update_layout(xaxis_title='Emotional State', yaxis_title='Count', showlegend=False)
-
-                # Crear la leyenda de emociones
-                emotion_legend_items = []
-                for emotion, color in emotion_color_map.items():
-                    emotion_legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
-                                                f"<div style='width: 20px; height: 20px; background-color: {color}; margin-right: 10px;'></div>"
-                                                f"<div style='font-size: 16px;'>{emotion}</div></div>")
-                emotion_legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(emotion_legend_items) + "</div>"
-
-                # Crear la leyenda de robots
-                robot_legend_items = []
-                for robot, color in robot_color_map.items():
-                    robot_legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
+        # Filtrar los nombres de los robots
+        results = info_actores(store, 'Robot')
+
+        if not results.empty:
+            st.markdown("<div class='card-container'>", unsafe_allow_html=True)
+            for robot, type_value, name_value in results.itertuples(index=False):
+                st.markdown(f"""
+                    <div class='card'>
+                        <div class='card-title'>{robot}</div>
+                        <div class='card-content'>Type: {type_value}</div>
+                        <div class='card-content'>Name: {name_value}</div>
+                    </div>
+                """, unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        else:
+            st.warning("No values found for the specified robots.")
+
+        st.markdown ("# Emotions resume for all robots")
+        st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
+
+        result_data = interacciones_de_la_sesion(store)
+
+        # Filtrar los datos para EmotionalState no nulos, con las fechas ya convertidas
+        emotional_data = get_emotional_states(result_data)
+
+        if not emotional_data.empty:
+
+            # Asignar colores específicos a cada emoción y a cada robot
+            emotion_color_map = color_map(emotional_data['EmotionalState'].unique())
+            robot_color_map = color_map(emotional_data['Robot'].unique())
+
+            # Crear la leyenda de emociones
+            emotion_legend_items = []
+            for emotion, color in emotion_color_map.items():
+                emotion_legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
                                             f"<div style='width: 20px; height: 20px; background-color: {color}; margin-right: 10px;'></div>"
-                                            f"<div style='font-size: 16px;'>{robot}</div></div>")
-                robot_legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(robot_legend_items) + "</div>"
-
-                # Mostrar ambas gráficas una al lado de la otra con sus leyendas respectivas
-                col1, col2 = st.columns(2)
-
-                with col1:            
-                    st.markdown(robot_legend_html, unsafe_allow_html=True)
-                    st.plotly_chart(fig_time)
-
-                with col2:
-                    st.markdown(emotion_legend_html, unsafe_allow_html=True)
-                    st.plotly_chart(fig_count)
+                                            f"<div style='font-size: 16px;'>{emotion}</div></div>")
+            emotion_legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(emotion_legend_items) + "</div>"
+
+            # Crear la leyenda de robots
+            robot_legend_items = []
+            for robot, color in robot_color_map.items():
+                robot_legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
+                                        f"<div style='width: 20px; height: 20px; background-color: {color}; margin-right: 10px;'></div>"
+                                        f"<div style='font-size: 16px;'>{robot}</div></div>")
+            robot_legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(robot_legend_items) + "</div>"
+
+            # Mostrar ambas gráficas una al lado de la otra con sus leyendas respectivas
+            col1, col2 = st.columns(2)
+
+            with col1:            
+                st.markdown(robot_legend_html, unsafe_allow_html=True)
+                date_range = rango_de_fechas(emotional_data, 'date_range_all')
+                mostrar_figura(None, CHART_TIME, emotional_data, robot_color_map, date_range)
+
+            with col2:
+                st.markdown(emotion_legend_html, unsafe_allow_html=True)
+                mostrar_figura(None, CHART_COUNT, conteo_emociones_de_la_sesion(emotional_data), emotion_color_map)
    
                 
                 
-                # Filtrar por node1 cuando node2 = 'Robot'
-                robots = data[data['node2'] == 'Robot']
-                robot_names = robots['node1'].unique()
-
-                
-                st.markdown ("# Statistics for each robot")           
-                st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Select a robot</div>', unsafe_allow_html=True)
-                selected_robot = st.selectbox("", robot_names)
-                st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
-                
-                interactions = data[data['node2'] == 'Action']
-
-                
-                st.markdown (f"# Interactions carried out by {selected_robot}:")
-                
-                col1, col2 = st.columns([1, 1])
-
-                total_Robot_Interactions = 0
-
-                with col1:
-                    for _, interaction in interactions.iterrows():
-                        interaction_id = interaction['node1']
-                        interactionByRobot = data[(data['label'] == "performedBy") & (data['node2'] == selected_robot) & (data['node1'] == interaction_id)]
-
-                        if not interactionByRobot.empty:
-                            total_Robot_Interactions += 1
+        else:
+            st.warning("No emotional state data found for the robots")
 
-                    st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Overview</div>', unsafe_allow_html=True)
-                    st.metric(label="Total Interactions", value=total_Robot_Interactions, delta=f"{total_Robot_Interactions} 🟢")
-
-                    st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Interactions Status</div>', unsafe_allow_html=True)
-                    st.success(f"The robot {selected_robot} has carried out a total of {total_Robot_Interactions} interactions.")
-                
-                st.markdown('<div style="color:#00629b; font-size: 35px;"> </div>', unsafe_allow_html=True)
-                
-                def get_interactions_for_robot(selected_robot):
-                    # Filtrar las interacciones realizadas por el robot seleccionado
-                    interactions = data[(data['label'] == 'performedBy') & (data['node2'] == selected_robot) | (data['label'] == 'objectOfAction') & (data['node2'] == selected_robot)]
-                    
-                    # Inicializar listas para almacenar los resultados
-                    interaction_list = []
-                    date_interaction_list = []
-                    emotional_state_list = []
-                    date_emotional_state_list = []
-
-                    # Iterar sobre cada interacción
-                    for _, interaction_row in interactions.iterrows():
-                        interaction = interaction_row['node1']
-        
-                        # Obtener la fecha de la interacción
-                        date_interaction = data[(data['node1'] == interaction) & (data['label'] == 'date')]['node2'].values
-                        date_interaction = date_interaction[0] if date_interaction else None
-        
-                        # Obtener el estado emocional causado por la interacción
-                        emotional_state_rows = data[(data['label'] == 'causedBy') & (data['node2'] == interaction)]
-                        if not emotional_state_rows.empty:
-                            emotional_state_node = emotional_state_rows['node1'].values[0]
-                            emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'hasEmotionalState')]['node2'].values
-                            emotional_state = emotional_state[0] if emotional_state else None
-
-                            # Obtener la fecha del estado emocional
-                            date_emotional_state = data[(data['node1'] == emotional_state_node) & (data['label'] == 'date')]['node2'].values
-                            date_emotional_state = date_emotional_state[0] if date_emotional_state else None
-                        else:
-                            emotional_state = None
-                            date_emotional_state = None
-
-                        # Añadir los resultados a las listas
-                        interaction_list.append(interaction)
-                        date_interaction_list.append(date_interaction)
-                        emotional_state_list.append(emotional_state)
-                        date_emotional_state_list.append(date_emotional_state)
-
-                    # Crear el DataFrame resultante
-                    result_data = pd.DataFrame({
-                    'Robot': selected_robot,
-                    'Interaction': interaction_list,
-                    'DateInteraction': date_interaction_list,
-                    'EmotionalState': emotional_state_list,
-                    'DateEmotionalState': date_emotional_state_list
-    })
-
-                    return result_data
-                
-                st.markdown('<div style="color:#00629b; font-size: 35px;"></div>', unsafe_allow_html=True)
-                
-                st.markdown ("# Emotions for each robot")
-                st.markdown('<div style="color:#00629b; font-size: 35px;"></div>', unsafe_allow_html=True)
-                                    
-                if selected_robot:
-                    result_data = get_interactions_for_robot(selected_robot)
-                    
-                    # Filtrar los datos para EmotionalState no nulos
-                    emotional_data = result_data[result_data['EmotionalState'].notnull()]
-
-                    if not emotional_data.empty:
-                        # Formatear las fechas
-                        emotional_data['DateEmotionalState'] = emotional_data['DateEmotionalState'].str.lstrip('^')
-                        emotional_data['DateEmotionalState'] = pd.to_datetime(emotional_data['DateEmotionalState'], format='%Y-%m-%dT%H:%M:%SZ')
-
-                        # Asignar colores específicos a cada emoción
-                        unique_emotions = emotional_data['EmotionalState'].unique()
-                        colors = px.colors.qualitative.Plotly[:len(unique_emotions)]
-                        color_map = dict(zip(unique_emotions, colors))
-
-                        # Generar la gráfica de estados emocionales a lo largo del tiempo
-                        fig_time = px.scatter(emotional_data, x='DateEmotionalState', y='EmotionalState', 
-                              title='Emotional States Over Time', 
-                              labels={'DateEmotionalState': 'Date', 'EmotionalState': 'Emotional State'},
-                              color='EmotionalState',
-                              color_discrete_map=color_map,
-                              template='plotly_dark')
-
-                        fig_time.update_traces(marker=dict(size=10), selector=dict(mode='markers'))
-                        fig_time.update_layout(xaxis_title='Date', yaxis_title='Emotional State', showlegend=False)
-
-                        # Generar la gráfica de recuento de sentimientos
-                        emotional_count = emotional_data['EmotionalState'].value_counts().reset_index()
-                        emotional_count.columns = ['EmotionalState', 'Count']
-
-                        fig_count = px.bar(emotional_count, x='EmotionalState', y='Count', 
-                           title='Count of Emotional States', 
-                           labels={'EmotionalState': 'Emotional State', 'Count': 'Count'},
-                           color='EmotionalState',
-                           color_discrete_map=color_map,
-                           template='plotly_dark')
-
-                        fig_count.update_layout(xaxis_title='Emotional State', yaxis_title='Count', showlegend=False)
-
-                        # Crear la leyenda utilizando Streamlit
-                        legend_items = []
-                        for emotion, color in color_map.items():
-                            legend_items.append(f"<div style='display: flex; align-items: center; margin-right: 20px;'>"
-                                                f"<div style='width: 20px; height: 20px; background-color: {color}; margin-right: 10px;'></div>"
-                                                f"<div style='font-size: 16px;'>{emotion}</div></div>")
-                        legend_html = "<div style='display: flex; flex-wrap: wrap; justify-content: center; margin-bottom: 20px;'>" + "".join(legend_items) + "</div>"
-
-                        st.markdown(legend_html, unsafe_allow_html=True)
-
-                        # Mostrar ambas gráficas una al lado de la otra
-                        col1, col2 = st.columns(2)
-                        col1.plotly_chart(fig_time)
-                        col2.plotly_chart(fig_count)
-                
-                
-                    
-            else:
-                st.warning("Please upload a CSV file in the 'Upload CSV' tab")
+        ranking_transiciones(store)
+        estadisticas_robot(store)
     else:
         st.warning("Please upload a CSV file in the 'Upload CSV' tab")
 
-with tab4:
+def pagina_humanos():
     st.markdown('<div style="color:#00629b; font-size: 35px;">Human Statistics</div>', unsafe_allow_html=True)
-    if data is not None:
-        if 'node1' in data.columns and 'node2' in data.columns:
-            # Contar humanos
-            humans = data[data['node2'] == 'Human']['node1'].unique()
-            num_humans = len(humans)
+    # Con Neo4j no hay tripletas locales: las consultas van a la base de datos
+    store = None if usa_neo4j() else almacen_actual()
+    if usa_neo4j() or store is not None:
+        # Contar humanos
+        humans = nodos_de_tipo(store, 'Human')
+        num_humans = len(humans)
             
-            st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Number of Humans: {num_humans}</div>', unsafe_allow_html=True)
-            st.markdown(f"<div class='icon'> {'🧍' * num_humans}</div>", unsafe_allow_html=True)
+        st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Number of Humans: {num_humans}</div>', unsafe_allow_html=True)
+        st.markdown(f"<div class='icon'> {'🧍' * num_humans}</div>", unsafe_allow_html=True)
 
         # Lógica adicional para obtener el valor de label para cada humano
         st.markdown('<div style="color:#00629b; font-size: 35px;">Information about each Human</div>', unsafe_allow_html=True)
         st.markdown('<div style="color:#00629b; font-size: 35px;"> </div>', unsafe_allow_html=True)
         
-        if 'node1' in data.columns and 'node2' in data.columns and 'label' in data.columns:
-            # Filtrar los nombres de los humanos
-            human_names = data[data['node2'] == 'Human']['node1'].unique()
-
-            results = []
-            for human in human_names:
-                label_value = data[(data['node1'] == human) & (data['label'] == 'type')]['node2'].values
-                label_value1 = data[(data['node1'] == human) & (data['label'] == 'label')]['node2'].values
-                if len(label_value) > 0:
-                    results.append((human, label_value[0], label_value1[0]))
-
-            if results:
-                results_data = pd.DataFrame(results, columns=['Human', 'Label Value', 'name'])
-                st.dataframe(results_data)
-            else:
-                st.warning("No se encontraron valores para los humanos especificados.")
+        # Filtrar los nombres de los humanos
+        results_data = info_actores(store, 'Human')
+
+        if not results_data.empty:
+            st.dataframe(results_data)
+        else:
+            st.warning("No se encontraron valores para los humanos especificados.")
                 
-            if 'label' in data.columns and 'node1' in data.columns and 'node2' in data.columns:
-                # Filtrar por node1 cuando node2 = 'Human'
-                humans = data[data['node2'] == 'Human']
-                human_names = humans['node1'].unique()
-
-                st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;">Select a human</div>', unsafe_allow_html=True)
-                selected_human = st.selectbox("", human_names)
-                st.markdown('<div style="color:#00a9e0; font-size: 20px; text-align: left;"> </div>', unsafe_allow_html=True)
-
-                interactions = data[data['node2'] == 'Action']
-
-                st.markdown(f'<div style="color:#00a9e0; font-size: 20px;">Interactions carried out by {selected_human}:</div>', unsafe_allow_html=True)
-
-                col1, col2 = st.columns([1, 1])
-
-                total_Human_Interactions = 0
-
-                with col1:
-                    for _, interaction in interactions.iterrows():
-                        interaction_id = interaction['node1']
-                        interactionByHuman = data[(data['label'] == "performedBy") & (data['node2'] == selected_human) & (data['node1'] == interaction_id)]
-
-                        if not interactionByHuman.empty:
-                            total_Human_Interactions += 1
-                            st.write(f"Interaction: {interaction_id}")
-                            st.write(interactionByHuman)
-
-                with col2:
-                    st.markdown('<div style="color:#00629b; font-size: 35px;">Overview</div>', unsafe_allow_html=True)
-                    st.metric(label="Total Interactions", value=total_Human_Interactions, delta=f"{total_Human_Interactions} 🟢")
-
-                    st.markdown('<div style="color:#00629b; font-size: 35px;">Interactions Status</div>', unsafe_allow_html=True)
-                    st.success(f"The human {selected_human} has carried out a total of {total_Human_Interactions} interactions.")
-
-                    st.markdown('<div style="color:#00629b; font-size: 35px;">Progress</div>', unsafe_allow_html=True)
-                    st.progress(total_Human_Interactions / len(interactions) if len(interactions) > 0 else 0)
-
-                st.markdown('<div style="color:#00629b; font-size: 35px;"> </div>', unsafe_allow_html=True)    
-                st.markdown('<div style="color:#00629b; font-size: 35px;">Display data on status changes</div>', unsafe_allow_html=True)
-
-                # Agregar un contenedor expandible
-                with st.expander(f"Emotional state changes by {selected_human}"):
-                    interaction_names = []
-                    emotional_states_data = []
-
-                    for _, interaction in interactions.iterrows():
-                        interaction_id = interaction['node1']
-                        emotionalStates = data[(data['label'] == 'hasEmotionalState') & (data['node1'] == selected_human)]
-
-                        if not emotionalStates.empty:
-                            for _, state in emotionalStates.iterrows():
-                                state_value = state['node2']
-                                emotional_states_data.append((selected_human, state_value))
-                                interaction_names.append(interaction_id)
-
-                    if emotional_states_data:
-                        emotional_states_data = pd.DataFrame(emotional_states_data, columns=['Human', 'Emotional State'])
-                        st.dataframe(emotional_states_data)
-                    else:
-                        st.warning(f"No emotional state data found for {selected_human}")
-
-                    st.markdown('<div style="color:#00629b; font-size: 35px;">Graph of Emotional States</div>', unsafe_allow_html=True)
-
-                    if emotional_states_data:
-                        fig = go.Figure()
-
-                        emotional_states_count = emotional_states_data['Emotional State'].value_counts()
-                        fig.add_trace(go.Bar(
-                            x=emotional_states_count.index,
-                            y=emotional_states_count.values,
-                            marker_color='blue'
-                        ))
-
-                        fig.update_layout(
-                            title=f"Emotional State Distribution for {selected_human}",
-                            xaxis_title="Emotional State",
-                            yaxis_title="Count",
-                            title_x=0.5
-                        )
-
-                        st.plotly_chart(fig)
-                    else:
-                        st.warning(f"No emotional state data found for {selected_human}")
-            else:
-                st.warning("Please upload a CSV file in the 'Upload CSV' tab")
+        estadisticas_humano(store)
     else:
         st.warning("Please upload a CSV file in the 'Upload CSV' tab")
-        
-        # Pie de página
+
+# Biblioteca de instantáneas recientes: abrir una cambia el conjunto de datos
+# de la sesión sin volver a subir ni analizar el CSV
+with st.sidebar:
+    st.markdown('<p style="color:#00629b; font-size: 25px; margin-bottom: 0;">Snapshots</p>', unsafe_allow_html=True)
+    snapshots = list_snapshots(SNAPSHOT_DIR)[:SNAPSHOT_LIBRARY_SIZE]
+    if not snapshots:
+        st.caption("Saved snapshots of uploaded files appear here")
+    for info in snapshots:
+        active = st.session_state.get('store_snapshot') == info['path']
+        st.button(f"{info['name']} ({info['rows']:,} rows)", key=f"snapshot_{info['key']}",
+                  type='primary' if active else 'secondary', width='stretch',
+                  on_click=abrir_snapshot, args=(info,))
+
+# Filas nuevas del fichero o directorio que sigue la sesión
+if 'store_tail' in st.session_state:
+    with st.sidebar:
+        actualizar_en_vivo()
+
+# Tema y altura de las gráficas de emociones; se aplican sobre las figuras
+# cacheadas sin volver a construirlas
+with st.sidebar:
+    st.markdown('<p style="color:#00629b; font-size: 25px; margin-bottom: 0;">Charts</p>', unsafe_allow_html=True)
+    st.selectbox("Chart theme", CHART_THEMES, key='chart_theme')
+    st.slider("Chart height", 300, 900, CHART_HEIGHT, step=50, key='chart_height')
+
+# Origen de los datos de las páginas de robots y humanos
+if NEO4J_ENABLED:
+    with st.sidebar:
+        st.radio("Data source", [SOURCE_CSV, SOURCE_NEO4J], key='data_source')
+
+# Navegación entre páginas en la parte superior, en lugar de las antiguas pestañas
+navegacion = st.navigation([
+    st.Page(pagina_cargar_csv, title="Upload CSV", url_path="upload-csv", default=True),
+    st.Page(pagina_modelo, title="ML Model", url_path="ml-model"),
+    st.Page(pagina_robots, title="Robot Statistics", url_path="robot-statistics"),
+    st.Page(pagina_humanos, title="Human Statistics", url_path="human-statistics")
+], position="top")
+navegacion.run()
+
+# Pie de página
 st.markdown(
     """
     <hr style="border: 1px solid #00629b;">